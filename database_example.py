@@ -1,5 +1,19 @@
-from sqlalchemy import create_engine, Column, Integer, String, Sequence
-from sqlalchemy.orm import sessionmaker
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import (create_engine, event, inspect, Column, Integer, String, Sequence, func,
+                        select)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import make_transient_to_detached, scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 
 # Define the database connection URL (using in-memory SQLite for this example)
@@ -28,9 +42,582 @@ Base.metadata.create_all(bind=engine)
 # Create a SessionLocal class to interact with the database
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Rows sent to the database per executemany() call by bulk_insert_users().
+BULK_INSERT_BATCH_SIZE = 10000
+
+
+def bulk_insert_users(users, bind=None, batch_size=BULK_INSERT_BATCH_SIZE):
+    """
+    Inserts many users at once and returns how many were inserted.
+
+    `users` is an iterable of {"name": ..., "email": ...} dicts, consumed `batch_size` at
+    a time. Each batch is one Core `insert()` executed with executemany, all in a single
+    transaction. No User objects are created, so there is no identity-map or
+    unit-of-work bookkeeping per row. If any row fails (e.g. a duplicate email), the
+    whole load is rolled back. `bind` defaults to the module's engine.
+    """
+    statement = User.__table__.insert()
+    users = iter(users)
+    inserted = 0
+    with (bind or engine).begin() as connection:
+        while True:
+            batch = list(itertools.islice(users, batch_size))
+            if not batch:
+                return inserted
+            connection.execute(statement, batch)
+            inserted += len(batch)
+
+
+def _generated_users(count, start=0):
+    return ({"name": f"User {i}", "email": f"user{i}@example.com"}
+            for i in range(start, start + count))
+
+
+def benchmark_bulk_insert(sizes=(10000, 100000, 1000000)):
+    """
+    Times loading `size` users into a fresh in-memory database in three ways:
+    one ORM object per row with db.add(), Session.bulk_save_objects(), and
+    bulk_insert_users(). Each method commits once at the end. Returns a list of
+    (size, method, seconds) tuples.
+    """
+    def orm_add(session, size):
+        for row in _generated_users(size):
+            session.add(User(**row))
+        session.commit()
+
+    def bulk_save_objects(session, size):
+        session.bulk_save_objects([User(**row) for row in _generated_users(size)])
+        session.commit()
+
+    def core_insert(session, size):
+        bulk_insert_users(_generated_users(size), bind=session.get_bind())
+
+    results = []
+    for size in sizes:
+        for method, load in [("ORM add", orm_add), ("bulk_save_objects", bulk_save_objects),
+                             ("Core insert", core_insert)]:
+            benchmark_engine = create_engine(DATABASE_URL)
+            Base.metadata.create_all(bind=benchmark_engine)
+            session = sessionmaker(bind=benchmark_engine)()
+            start = time.perf_counter()
+            load(session, size)
+            seconds = time.perf_counter() - start
+            assert session.scalar(select(func.count()).select_from(User)) == size
+            session.close()
+            benchmark_engine.dispose()
+            results.append((size, method, seconds))
+    return results
+
+
+# Rows fetched per query by iter_users().
+USER_PAGE_SIZE = 1000
+
+
+def iter_users(db, page_size=USER_PAGE_SIZE):
+    """
+    Yields every User in primary-key order, fetching `page_size` rows per query.
+
+    Uses keyset pagination: each page is `WHERE id > :last_id ORDER BY id LIMIT n`,
+    which the primary-key index answers directly, so page N costs the same as
+    page 1 (unlike OFFSET, which scans past every skipped row). Only one page is
+    held at a time. The session's identity map is weak-referencing, so users the
+    caller doesn't keep are freed and memory stays flat however large the table is.
+    """
+    last_id = None
+    while True:
+        statement = select(User).order_by(User.id).limit(page_size)
+        if last_id is not None:
+            statement = statement.where(User.id > last_id)
+        page = db.scalars(statement).all()
+        if not page:
+            return
+        yield from page
+        last_id = page[-1].id
+
+
+def benchmark_user_pagination(sizes=(100000, 1000000), page_size=USER_PAGE_SIZE):
+    """
+    Compares ways of walking a `size`-row users table: db.query(User).all(),
+    OFFSET/LIMIT pages, and iter_users(). Reports the total time, how long the first
+    and last page took to fetch (for query().all() the first "page" is the whole
+    table), and the peak memory traced during the walk. Returns a list of
+    (size, method, seconds, first_page_seconds, last_page_seconds, peak_bytes) tuples.
+    """
+    def query_all(session):
+        yield from session.query(User).all()
+
+    def offset_pages(session):
+        offset = 0
+        while True:
+            page = session.scalars(
+                select(User).order_by(User.id).offset(offset).limit(page_size)).all()
+            if not page:
+                return
+            yield from page
+            offset += page_size
+
+    def walk(rows):
+        # Every page_size-th next() is the one that runs the page's query.
+        rows = iter(rows)
+        count = 0
+        page_seconds = []
+        start = time.perf_counter()
+        while True:
+            fetch_start = time.perf_counter()
+            if next(rows, None) is None:
+                return count, time.perf_counter() - start, page_seconds[0], page_seconds[-1]
+            if count % page_size == 0:
+                page_seconds.append(time.perf_counter() - fetch_start)
+            count += 1
+
+    results = []
+    for size in sizes:
+        benchmark_engine = create_engine(DATABASE_URL)
+        Base.metadata.create_all(bind=benchmark_engine)
+        bulk_insert_users(_generated_users(size), bind=benchmark_engine)
+        session_factory = sessionmaker(bind=benchmark_engine)
+        for method, iterate in [("query().all()", query_all), ("OFFSET pages", offset_pages),
+                                ("iter_users", lambda session: iter_users(session, page_size))]:
+            with session_factory() as session:
+                count, seconds, first_page, last_page = walk(iterate(session))
+            assert count == size
+            # Memory is measured in a second pass; tracing would distort the timings.
+            with session_factory() as session:
+                tracemalloc.start()
+                for _ in iterate(session):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results.append((size, method, seconds, first_page, last_page, peak))
+        benchmark_engine.dispose()
+    return results
+
+
+# Settings applied by create_sqlite_engine() to every new connection.
+SQLITE_JOURNAL_MODE = "WAL"      # Readers don't block the writer, and commits append to the log.
+SQLITE_SYNCHRONOUS = "NORMAL"    # With WAL, fsync at checkpoints rather than on every commit.
+SQLITE_MMAP_SIZE = 256 * 2**20   # Bytes of the file read through mmap instead of read() calls.
+SQLITE_CACHE_SIZE = -64 * 1024   # Page cache per connection; negative values are KiB.
+SQLITE_BUSY_TIMEOUT = 5.0        # Seconds to wait for a lock before "database is locked".
+SQLITE_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# Connection pool of create_sqlite_engine(): connections kept open, and extra ones allowed
+# under load.
+SQLITE_POOL_SIZE = 8
+SQLITE_MAX_OVERFLOW = 8
+SQLITE_POOL_TIMEOUT = 30.0
+
+
+def create_sqlite_engine(path, journal_mode=SQLITE_JOURNAL_MODE, synchronous=SQLITE_SYNCHRONOUS,
+                         mmap_size=SQLITE_MMAP_SIZE, cache_size=SQLITE_CACHE_SIZE,
+                         busy_timeout=SQLITE_BUSY_TIMEOUT, pool_size=SQLITE_POOL_SIZE,
+                         max_overflow=SQLITE_MAX_OVERFLOW, pool_timeout=SQLITE_POOL_TIMEOUT,
+                         **kwargs):
+    """
+    Creates an engine for the SQLite database file at `path`, tuned for many threads.
+
+    Every connection the pool opens runs PRAGMA journal_mode, synchronous, mmap_size
+    and cache_size with the given values (None leaves that PRAGMA at SQLite's
+    default). The defaults use WAL with synchronous=NORMAL: readers and the writer
+    no longer block each other, and a commit is an append to the log rather than
+    an fsync of the database. A power loss can roll back the last few commits, but
+    cannot corrupt the database. The engine keeps a QueuePool of `pool_size`
+    connections plus up to `max_overflow` more, and waits `pool_timeout` seconds for
+    a free one. Other keyword arguments are passed to create_engine(); `timeout` is
+    set to `busy_timeout` in the `connect_args` given to sqlite3.connect().
+    """
+    if journal_mode is not None and journal_mode.upper() not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"journal_mode must be one of {SQLITE_JOURNAL_MODES}, "
+                         f"not {journal_mode!r}")
+    if synchronous is not None and synchronous.upper() not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"synchronous must be one of {SQLITE_SYNCHRONOUS_MODES}, "
+                         f"not {synchronous!r}")
+    pragmas = [f"PRAGMA {name} = {value}" for name, value in [
+        ("journal_mode", journal_mode), ("synchronous", synchronous),
+        ("mmap_size", None if mmap_size is None else int(mmap_size)),
+        ("cache_size", None if cache_size is None else int(cache_size))] if value is not None]
+    connect_args = {**kwargs.pop("connect_args", {}), "timeout": busy_timeout}
+
+    sqlite_engine = create_engine(f"sqlite:///{os.path.abspath(path)}", poolclass=QueuePool,
+                                  pool_size=pool_size, max_overflow=max_overflow,
+                                  pool_timeout=pool_timeout, connect_args=connect_args,
+                                  **kwargs)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return sqlite_engine
+
+
+def _sqlite_benchmark_worker(bind, stop, size, seed, write):
+    """
+    Fetches random users by id, or with `write` updates their email and commits, each
+    in its own session, until `stop` is set. Returns (operations done, operations that
+    failed with "database is locked").
+    """
+    session_factory = sessionmaker(bind=bind)
+    rng = random.Random(seed)
+    done = errors = 0
+    while not stop.is_set():
+        user_id = rng.randint(1, size)
+        try:
+            with session_factory() as db:
+                user = db.get(User, user_id)
+                if write and user is not None:
+                    user.email = f"user{user_id}.{done}@example.com"
+                    db.commit()
+            done += 1
+        except OperationalError:
+            errors += 1
+    return done, errors
+
+
+def benchmark_sqlite_concurrency(reader_counts=(1, 4, 8), duration=3.0, size=10000):
+    """
+    Runs one writer thread, updating a random user's email and committing each time,
+    alongside 1, 4 and 8 reader threads fetching random users by id, for `duration`
+    seconds each. It compares a file database opened with create_engine() defaults
+    against create_sqlite_engine(). Every operation uses its own session. Returns a
+    list of (engine, readers, reads_per_second, writes_per_second, errors) tuples, where
+    errors counts operations that failed with "database is locked".
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for label, make_engine in [
+                ("defaults", lambda path: create_engine(f"sqlite:///{path}")),
+                ("create_sqlite_engine", create_sqlite_engine)]:
+            for readers in reader_counts:
+                benchmark_engine = make_engine(os.path.join(directory, f"{label}-{readers}.db"))
+                Base.metadata.create_all(bind=benchmark_engine)
+                bulk_insert_users(_generated_users(size), bind=benchmark_engine)
+                stop = threading.Event()
+                # Seed 0 is the writer, the others are readers.
+                with ThreadPoolExecutor(max_workers=readers + 1) as executor:
+                    futures = [executor.submit(_sqlite_benchmark_worker, benchmark_engine, stop,
+                                               size, seed, seed == 0)
+                               for seed in range(readers + 1)]
+                    time.sleep(duration)
+                    stop.set()
+                    (writes, write_errors), *reads = [future.result() for future in futures]
+                benchmark_engine.dispose()
+                read_errors = sum(errors for _, errors in reads)
+                results.append((label, readers, sum(done for done, _ in reads) / duration,
+                                writes / duration, write_errors + read_errors))
+    return results
+
+
+def run_user_load(session_registry, threads, duration=3.0, read_ratio=0.8, user_ids=None, seed=0):
+    """
+    Runs a mixed workload against the users table from `threads` threads for `duration` seconds.
+
+    `session_registry` is a scoped_session, so each thread works with its own session.
+    Each operation reads a random user by id or, with probability `1 - read_ratio`,
+    changes a random user's email and commits, then calls `session_registry.remove()`
+    as a request handler would. Ids are drawn from `user_ids`, which defaults to the
+    ids in the table when the run starts; an id deleted since then reads as a miss
+    and is not updated. Returns (ops_per_second, p50_seconds, p99_seconds, errors),
+    where errors counts operations that raised, e.g. "database is locked" or a pool timeout.
+    """
+    if user_ids is None:
+        user_ids = session_registry().scalars(select(User.id)).all()
+        session_registry.remove()
+    if not user_ids:
+        raise ValueError("run_user_load() needs at least one user")
+    stop = threading.Event()
+    latencies = []
+    errors = []
+    results_lock = threading.Lock()
+
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        thread_latencies = []
+        thread_errors = 0
+        while not stop.is_set():
+            user_id = rng.choice(user_ids)
+            start = time.perf_counter()
+            try:
+                db = session_registry()
+                user = db.get(User, user_id)
+                if user is not None and rng.random() >= read_ratio:
+                    user.email = f"user{user_id}.{worker_seed}.{len(thread_latencies)}@example.com"
+                    db.commit()
+                thread_latencies.append(time.perf_counter() - start)
+            except Exception:
+                # Counted rather than ending the thread, so one bad operation can't stop the run.
+                thread_errors += 1
+            finally:
+                session_registry.remove()
+        with results_lock:
+            latencies.extend(thread_latencies)
+            errors.append(thread_errors)
+
+    workers = [threading.Thread(target=worker, args=(seed * 1000 + i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    latencies.sort()
+    if not latencies:
+        return 0.0, float("nan"), float("nan"), sum(errors)
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+    return len(latencies) / duration, percentile(0.50), percentile(0.99), sum(errors)
+
+
+def benchmark_session_contention(thread_counts=(1, 2, 4, 8, 16), duration=3.0, size=10000,
+                                 read_ratio=0.8, pool_size=SQLITE_POOL_SIZE):
+    """
+    Runs run_user_load() with a growing number of threads against a file database
+    opened by create_sqlite_engine() with a pool of `pool_size` connections and no
+    overflow, so threads beyond the pool size wait for a connection. Returns a list of
+    (threads, ops_per_second, p50_seconds, p99_seconds, errors) tuples.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark_engine = create_sqlite_engine(os.path.join(directory, "users.db"),
+                                                pool_size=pool_size, max_overflow=0)
+        Base.metadata.create_all(bind=benchmark_engine)
+        bulk_insert_users(_generated_users(size), bind=benchmark_engine)
+        session_registry = scoped_session(sessionmaker(bind=benchmark_engine))
+        for threads in thread_counts:
+            results.append((threads,)
+                           + run_user_load(session_registry, threads, duration, read_ratio))
+        benchmark_engine.dispose()
+    return results
+
+
+# Defaults of UserLookupCache.
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 300.0  # Seconds before a cached user is looked up again.
+
+
+class UserLookupCache:
+    """
+    A bounded read-through cache for looking users up by name or email.
+
+    `get_by_name()` and `get_by_email()` return the same User as
+    `db.query(User).filter(...).first()`, but only query the database on a miss. Up
+    to `maxsize` users are kept, least recently used first out, and each entry
+    expires `ttl` seconds after it was loaded. Lookups that find no user are not
+    cached. The column values are cached rather than the User object, and a hit is
+    merged into the caller's session with `load=False`, so it needs no SQL.
+
+    Call `listen()` with a Session, sessionmaker or the Session class to keep the
+    cache current: users added, changed or deleted in a flush are dropped from the
+    cache then and again when the transaction commits, and ORM bulk UPDATE or DELETE
+    statements on users clear it. A lookup that was querying the database while its
+    user was invalidated does not cache what it read, which may be the old values.
+    Writes made outside those sessions are only seen once the entry's TTL runs out.
+    `hits` and `misses` count lookups.
+    """
+
+    _fields = ("name", "email")
+
+    def __init__(self, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (field, value) -> (expires_at, column values)
+        self._keys_by_id = {}          # user id -> set of (field, value) keys that map to it
+        self._lock = threading.Lock()  # Sessions in other threads may share the cache.
+        # Every invalidation bumps the generation. While lookups are querying the database,
+        # _invalidated keeps the generation at which each (field, value) key or ("id", user id)
+        # was last invalidated, so a lookup that started before then does not store its result.
+        self._generation = 0
+        self._invalidated = {}
+        self._cleared = 0  # Generation of the last clear(), which invalidates every key.
+        self._loading = 0  # Lookups querying the database right now.
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_by_name(self, db, name):
+        """Returns the first User named `name`, or None."""
+        return self._get(db, "name", name)
+
+    def get_by_email(self, db, email):
+        """Returns the User whose email is `email`, or None."""
+        return self._get(db, "email", email)
+
+    def _get(self, db, field, value):
+        key = (field, value)
+        with self._lock:
+            started = self._generation
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._discard(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._loading += 1
+        if entry is not None:
+            return self._attach(db, entry[1])
+        user = None
+        try:
+            user = db.query(User).filter(getattr(User, field) == value).first()
+        finally:
+            self._store(key, user, started)
+        return user
+
+    @staticmethod
+    def _attach(db, values):
+        # A user already in the session is returned as is, so its unflushed changes are kept.
+        user = db.identity_map.get(db.identity_key(User, values["id"]))
+        if user is not None:
+            return user
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def _store(self, key, user, started):
+        # Ends a lookup that began at generation `started`, caching `user` unless it was
+        # invalidated in the meantime.
+        values = None if user is None else {"id": user.id, "name": user.name, "email": user.email}
+        with self._lock:
+            self._loading -= 1
+            stale = values is not None and max(
+                self._cleared, self._invalidated.get(key, 0),
+                self._invalidated.get(("id", values["id"]), 0)) > started
+            if not self._loading:
+                self._invalidated.clear()
+            if values is None or stale:
+                return
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._keys_by_id.setdefault(values["id"], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        # Callers hold self._lock.
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_id.get(entry[1]["id"])
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_id[entry[1]["id"]]
+
+    def invalidate(self, user):
+        """Drops every cached entry for `user`, under its old and its current name and email."""
+        identity = inspect(user).identity
+        with self._lock:
+            if identity is not None:
+                self._discard_id(identity[0])
+            for field in self._fields:
+                if field in user.__dict__:
+                    key = (field, user.__dict__[field])
+                    self._discard(key)
+                    self._mark_invalidated(key)
+
+    def _discard_id(self, user_id):
+        # Callers hold self._lock.
+        for key in list(self._keys_by_id.get(user_id, ())):
+            self._discard(key)
+        self._mark_invalidated(("id", user_id))
+
+    def _mark_invalidated(self, key):
+        # Callers hold self._lock. Only lookups in flight need to know.
+        self._generation += 1
+        if self._loading:
+            self._invalidated[key] = self._generation
+
+    def clear(self):
+        """Empties the cache. The hit and miss counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+            # Nothing read before now may be stored: every key counts as invalidated.
+            self._generation += 1
+            self._cleared = self._generation
+
+    def listen(self, target):
+        """
+        Invalidates the cache from the session events of `target`: a Session, a
+        sessionmaker or the Session class.
+        """
+        event.listen(target, "after_flush", self._after_flush)
+        event.listen(target, "after_commit", self._after_commit)
+        event.listen(target, "after_soft_rollback", self._after_soft_rollback)
+        event.listen(target, "do_orm_execute", self._do_orm_execute)
+
+    def _after_flush(self, session, _flush_context):
+        changed = [obj for obj in itertools.chain(session.new, session.dirty, session.deleted)
+                   if isinstance(obj, User)]
+        for user in changed:
+            self.invalidate(user)
+        # Other sessions can re-cache the old values until the commit, so invalidate again then.
+        # New users have no identity until the flush completes, and nothing cached can point
+        # to them.
+        session.info.setdefault("user_cache_changed", set()).update(
+            inspect(user).identity[0] for user in changed if inspect(user).identity is not None)
+
+    def _after_commit(self, session):
+        user_ids = session.info.pop("user_cache_changed", ())
+        with self._lock:
+            for user_id in user_ids:
+                self._discard_id(user_id)
+
+    def _after_soft_rollback(self, session, _previous_transaction):
+        session.info.pop("user_cache_changed", None)
+
+    def _do_orm_execute(self, orm_execute_state):
+        if ((orm_execute_state.is_update or orm_execute_state.is_delete)
+                and orm_execute_state.bind_mapper is User.__mapper__):
+            self.clear()
+
+
+def benchmark_user_lookup_cache(size=10000, lookups=20000, maxsize=USER_CACHE_SIZE):
+    """
+    Times `lookups` lookups by name against a `size`-user table, drawn from a skewed
+    (Zipf-like) distribution so some users are much hotter than others, with
+    db.query(...).first() and with a UserLookupCache of `maxsize` entries. Each
+    lookup runs in a fresh session, as a request handler would. Returns a list of
+    (method, seconds, hit_rate) tuples.
+    """
+    benchmark_engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(bind=benchmark_engine)
+    bulk_insert_users(_generated_users(size), bind=benchmark_engine)
+    session_factory = sessionmaker(bind=benchmark_engine)
+    names = [f"User {i}" for i in random.Random(0).choices(
+        range(size), weights=[1 / (rank + 1) for rank in range(size)], k=lookups)]
+
+    cache = UserLookupCache(maxsize=maxsize)
+    cache.listen(session_factory)
+    results = []
+    for method, lookup in [
+            ("query().first()", lambda db, name: db.query(User).filter(User.name == name).first()),
+            ("UserLookupCache", cache.get_by_name)]:
+        start = time.perf_counter()
+        for name in names:
+            with session_factory() as db:
+                assert lookup(db, name).name == name
+        seconds = time.perf_counter() - start
+        hit_rate = cache.hits / lookups if method == "UserLookupCache" else 0.0
+        results.append((method, seconds, hit_rate))
+    benchmark_engine.dispose()
+    return results
+
+
 def demonstrate_crud():
     """Demonstrates Create, Read, Update, Delete operations."""
     db = SessionLocal()
+    # Lookups by name and email go through this cache, kept current by SessionLocal's
+    # session events.
+    user_cache = UserLookupCache()
+    user_cache.listen(SessionLocal)
 
     print("Demonstrating SQLAlchemy CRUD operations...")
 
@@ -47,12 +634,13 @@ def demonstrate_crud():
 
     # Read
     print("\n--- Read ---")
-    all_users = db.query(User).all()
+    # iter_users() pages through the table instead of loading it all at once.
     print("All users:")
-    for user in all_users:
+    for user in iter_users(db):
         print(user)
 
-    alice = db.query(User).filter(User.name == "Alice Wonderland").first()
+    # Lookups go through user_cache, which only queries the database on a miss.
+    alice = user_cache.get_by_name(db, "Alice Wonderland")
     print(f"Found Alice: {alice}")
 
     # Update
@@ -67,7 +655,7 @@ def demonstrate_crud():
 
     # Delete
     print("\n--- Delete ---")
-    bob = db.query(User).filter(User.name == "Bob The Builder").first()
+    bob = user_cache.get_by_name(db, "Bob The Builder")
     if bob:
         db.delete(bob)
         db.commit()
@@ -80,7 +668,86 @@ def demonstrate_crud():
     else:
         print("Bob not found for deletion.")
 
+    # Lookup cache
+    print("\n--- Lookup Cache ---")
+    # Alice's entry was dropped when her email changed, so the first lookup misses
+    # and the second is answered from the cache.
+    for _ in range(2):
+        print(f"Found by email: {user_cache.get_by_email(db, 'alice.wonderland@newdomain.com')}")
+    print(f"Cache hits: {user_cache.hits}, misses: {user_cache.misses}")
+
+    # File-backed SQLite
+    print("\n--- File-Backed SQLite ---")
+    # The in-memory database above disappears with the process; create_sqlite_engine()
+    # opens a database file with WAL and the other pragmas set on every connection.
+    with tempfile.TemporaryDirectory() as directory:
+        file_engine = create_sqlite_engine(os.path.join(directory, "users.db"))
+        Base.metadata.create_all(bind=file_engine)
+        bulk_insert_users(_generated_users(3), bind=file_engine)
+        with file_engine.connect() as connection:
+            for pragma in ["journal_mode", "synchronous", "mmap_size", "cache_size"]:
+                value = connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                print(f"PRAGMA {pragma} = {value}")
+            print(f"Users in the file: {connection.scalar(select(func.count()).select_from(User))}")
+        print(f"Connection pool: {file_engine.pool.status()}")
+        # Threads share the file through a scoped_session: each thread gets its own session
+        # from the registry. (The in-memory engine can't be shared; SQLAlchemy gives every
+        # thread its own connection, and so its own empty database.)
+        file_sessions = scoped_session(sessionmaker(autocommit=False, autoflush=False,
+                                                    bind=file_engine))
+        ops_per_second, p50, p99, errors = run_user_load(file_sessions, threads=4, duration=0.5)
+        print(f"4 threads reading and updating users: {ops_per_second:,.0f} ops/s, "
+              f"p50 {p50 * 1000:.2f}ms, p99 {p99 * 1000:.2f}ms, {errors} errors")
+        file_engine.dispose()
+
+    # Bulk insert
+    print("\n--- Bulk Insert ---")
+    # Adding thousands of users one db.add() at a time is slow; bulk_insert_users()
+    # sends them in large batches without creating a User object for each row.
+    inserted = bulk_insert_users(_generated_users(5000))
+    total = db.scalar(select(func.count()).select_from(User))
+    print(f"Bulk inserted {inserted} users; the table now has {total} users.")
+
     db.close()
 
+def main():
+    """Runs the CRUD demonstration, or a benchmark when one is named on the command line."""
+    parser = argparse.ArgumentParser(description="SQLAlchemy CRUD example.")
+    parser.add_argument("--benchmark",
+                        choices=["bulk-insert", "pagination", "lookup-cache", "sqlite-concurrency",
+                                 "contention"],
+                        help="Run a benchmark instead of the demonstration. "
+                             "'bulk-insert': ORM add vs bulk_save_objects vs Core insert. "
+                             "'pagination': query().all() vs OFFSET pages vs iter_users. "
+                             "'lookup-cache': query().first() vs UserLookupCache. "
+                             "'sqlite-concurrency': concurrent readers and a writer on a file "
+                             "database, "
+                             "create_engine() defaults vs create_sqlite_engine(). "
+                             "'contention': mixed reads and updates through scoped sessions as "
+                             "threads grow.")
+    args = parser.parse_args()
+
+    if args.benchmark == "bulk-insert":
+        for size, method, seconds in benchmark_bulk_insert():
+            print(f"{size:>8} rows, {method:>17}: {seconds:7.2f}s ({size / seconds:,.0f} rows/s)")
+    elif args.benchmark == "pagination":
+        for size, method, seconds, first_page, last_page, peak in benchmark_user_pagination():
+            print(f"{size:>8} rows, {method:>13}: {seconds:6.2f}s, "
+                  f"first page {first_page * 1000:7.1f}ms, "
+                  f"last page {last_page * 1000:7.1f}ms, peak {peak / 2**20:7.1f} MiB")
+    elif args.benchmark == "lookup-cache":
+        for method, seconds, hit_rate in benchmark_user_lookup_cache():
+            print(f"{method:>15}: {seconds:6.2f}s, hit rate {hit_rate:.1%}")
+    elif args.benchmark == "sqlite-concurrency":
+        for label, readers, reads, writes, errors in benchmark_sqlite_concurrency():
+            print(f"{label:>20}, {readers} readers + 1 writer: {reads:9,.0f} reads/s, "
+                  f"{writes:7,.0f} writes/s, {errors} locked")
+    elif args.benchmark == "contention":
+        for threads, ops_per_second, p50, p99, errors in benchmark_session_contention():
+            print(f"{threads:>3} threads: {ops_per_second:8,.0f} ops/s, p50 {p50 * 1000:6.2f}ms, "
+                  f"p99 {p99 * 1000:7.2f}ms, {errors} errors")
+    else:
+        demonstrate_crud()
+
 if __name__ == "__main__":
-    demonstrate_crud()
+    main()
@@ -3,90 +3,814 @@
 # of Python scripts in this repository, with syntax highlighting.
 
 import os
+import re
+import ast
+import json
+import html
 import glob
-from pygments import highlight
+import gzip
+import hashlib
+import time
+import shutil
+import argparse
+import tempfile
+import functools
+import contextlib
+import collections
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import lzma  # Optional: Python can be built without it.
+except ImportError:
+    lzma = None
+import pygments
 from pygments.lexers import get_lexer_by_name
-from pygments.formatters import HtmlFormatter
+from pygments.formatters import HtmlFormatter, NullFormatter, TerminalFormatter
+
+# The Pygments style used for highlighting. It is also part of the fragment cache key,
+# so changing it automatically invalidates previously cached fragments.
+PYGMENTS_STYLE = 'default'
+
+# Directory where highlighted fragments are cached between runs.
+DEFAULT_CACHE_DIR = ".index_cache"
+
+# Directory (next to index.html) that holds one highlighted fragment per script in sharded mode.
+DEFAULT_FRAGMENTS_DIR = "fragments"
+
+# File (next to index.html) holding the search index in --search mode.
+DEFAULT_SEARCH_INDEX = "search-index.json"
+
+# Bump this when extract_search_terms() changes, so cached terms are recomputed.
+SEARCH_TERMS_VERSION = 1
+
+# Default path of the JSON report written by --profile.
+DEFAULT_PROFILE_REPORT = "build-profile.json"
+
+# First line of every stylesheet written by write_stylesheet(). Only files that start with
+# it are removed as stale, so a hand-written pygments-*.css next to index.html is left alone.
+STYLESHEET_MARKER = ("/* Generated by generate_html_index.py; "
+                     "replaced when the Pygments CSS changes. */\n")
+
+# Suffixes of the precompressed copies written next to each output file.
+PRECOMPRESSED_SUFFIXES = (".gz", ".xz")
+
+# Number of files handed to a worker process at once in parallel mode.
+# Small scripts highlight in a few milliseconds, so batching keeps the
+# inter-process overhead low without hurting load balancing.
+PARALLEL_CHUNKSIZE = 16
+
+# Upper bound on the number of batches queued in the process pool at once. Finished
+# fragments wait in memory until they are written, so this keeps memory use flat
+# however many scripts are indexed.
+MAX_PENDING_BATCHES = 4 * (os.cpu_count() or 1)
 
 def get_pygments_css():
     """Generates CSS definitions for Pygments highlighting."""
     # Using a specific style, e.g., 'default' or 'friendly'
     # Using noclasses=False means Pygments will use predefined CSS classes like .k, .s etc.
     # cssclass="highlight" means the outer div will have class "highlight"
-    formatter = HtmlFormatter(style='default', cssclass="highlight", noclasses=False)
-    return formatter.get_style_defs('.highlight') # Pass the main class selector
+    return get_formatter("html").get_style_defs('.highlight') # Pass the main class selector
 
-def generate_html_for_files(file_paths, category_title):
+class FragmentCache:
     """
-    Generates HTML for a list of Python files, including syntax-highlighted code.
-    Args:
-        file_paths (list): A list of paths to Python files.
-        category_title (str): The title for this category of files.
-    Returns:
-        str: HTML string for the given files.
+    A persistent on-disk cache of highlighted HTML fragments.
+
+    Each entry is keyed by a hash of the file's content together with the Pygments
+    version and style, so a file is only re-highlighted when its content changes
+    (or when Pygments itself is upgraded or the style is changed).
     """
-    if not file_paths:
-        return ""
 
-    html_sections = [f"<h2>{category_title}</h2>"]
-    lexer = get_lexer_by_name("python")
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, style=PYGMENTS_STYLE):
+        self.cache_dir = cache_dir
+        self.style = style
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, code_content):
+        """Returns the cache key for the given source code."""
+        digest = hashlib.sha256()
+        digest.update(f"pygments={pygments.__version__};style={self.style}\n".encode('utf-8'))
+        digest.update(code_content.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path_for(self, key):
+        # Entries are spread over 256 sub-directories to keep directory listings small.
+        return os.path.join(self.cache_dir, key[:2], f"{key}.html")
+
+    def get(self, key):
+        """Returns the cached fragment for `key`, or None if it is not cached."""
+        try:
+            with open(self._path_for(key), 'r', encoding='utf-8') as f:
+                fragment = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fragment
+
+    def put(self, key, fragment, path=None):
+        """Stores a fragment. Errors are reported but never abort the build."""
+        path = path or self._path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first and rename it into place, so a reader
+            # never sees a half-written entry.
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(fragment)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry {path}: {e}")
+
+    def _terms_path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.terms-v{SEARCH_TERMS_VERSION}.json")
+
+    def get_terms(self, key):
+        """Returns the cached search terms for `key`, or None if they are not cached."""
+        try:
+            with open(self._terms_path_for(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_terms(self, key, terms):
+        """Stores the search terms of a file next to its fragment."""
+        self.put(key, json.dumps(terms, separators=(",", ":")), self._terms_path_for(key))
+
+# --- Rendering Engine ---
+# A file is lexed once into a token stream and formatted from those tokens: the index
+# build renders "html", and --preview renders any format through render_file(). To add
+# an output format, register a formatter factory here; it is created once per process.
+OUTPUT_FORMATTERS = {
     # Using noclasses=False with a chosen style for Pygments
-    formatter = HtmlFormatter(style='default', cssclass="highlight", noclasses=False)
+    "html": lambda: HtmlFormatter(style=PYGMENTS_STYLE, cssclass="highlight", noclasses=False),
+    # Coloured output for previewing a script in a terminal.
+    "ansi": TerminalFormatter,
+    # The plain source text.
+    "text": NullFormatter,
+}
+
+@functools.lru_cache(maxsize=None)
+def get_lexer():
+    """Returns the Python lexer, created once per process."""
+    return get_lexer_by_name("python")
 
-    for file_path in sorted(file_paths):
+@functools.lru_cache(maxsize=None)
+def get_formatter(output_format):
+    """Returns the formatter for one of the OUTPUT_FORMATTERS, created once per process."""
+    try:
+        factory = OUTPUT_FORMATTERS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown output format {output_format!r}; "
+                         f"choose one of {', '.join(sorted(OUTPUT_FORMATTERS))}") from None
+    return factory()
+
+def lex_source(code_content):
+    """
+    Lexes Python source into a token stream.
+    Returns:
+        tuple: (token_type, value) pairs. The stream is not cached: it is about 16x the
+            size of the source, and a build lexes each file only once. Callers that need
+            several formats keep the stream and pass it to render_tokens() for each.
+    """
+    return tuple(get_lexer().get_tokens(code_content))
+
+def render_tokens(tokens, output_format="html"):
+    """
+    Renders a token stream from lex_source() with one of the OUTPUT_FORMATTERS.
+    Returns:
+        str: The rendered output; for "html" a <div class="highlight">...</div> block.
+    """
+    return pygments.format(tokens, get_formatter(output_format))
+
+def render_file(file_path, output_formats=("html",)):
+    """
+    Reads and lexes a file once and renders it in one or more formats; used by --preview.
+    Returns:
+        dict: output format -> rendered output.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tokens = lex_source(f.read())
+    return {output_format: render_tokens(tokens, output_format) for output_format in output_formats}
+
+# Words indexed from docstrings and, for files that cannot be parsed, from the source.
+WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]+")
+
+def extract_search_terms(code_content):
+    """
+    Collects the searchable terms of a script using the `ast` module.
+    Identifiers (names, attributes, arguments, imports), function and class names
+    and the words of docstrings are indexed, in lower case. Identifiers such as
+    `say_hello_simple` are also indexed by their parts (`say`, `hello`, `simple`).
+    Returns:
+        dict: {"terms": sorted list of terms, "defs": function and class names in source order}
+    """
+    identifiers = set()
+    definitions = []
+    words = []
+    try:
+        tree = ast.parse(code_content)
+    except (SyntaxError, ValueError, RecursionError):
+        # Not valid Python 3 (e.g. an old Python 2 script): fall back to plain words.
+        tree = None
+        words = WORD_PATTERN.findall(code_content)
+
+    for node in ast.walk(tree) if tree is not None else ():
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            identifiers.add(node.name)
+            if node.name not in definitions:
+                definitions.append(node.name)
+        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            docstring = ast.get_docstring(node)
+            if docstring:
+                words.extend(WORD_PATTERN.findall(docstring))
+        elif isinstance(node, ast.Name):
+            identifiers.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            identifiers.add(node.attr)
+        elif isinstance(node, ast.arg):
+            identifiers.add(node.arg)
+        elif isinstance(node, ast.alias):
+            identifiers.update((node.asname or node.name).split("."))
+
+    terms = set()
+    for identifier in identifiers:
+        terms.add(identifier.lower())
+        terms.update(part.lower() for part in identifier.split("_") if len(part) > 1)
+    terms.update(word.lower() for word in words if len(word) > 2)
+    return {"terms": sorted(terms), "defs": definitions}
+
+@contextlib.contextmanager
+def timed(timings, stage):
+    """Adds the time spent in the `with` block to timings[stage] (if timings is not None)."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+def read_and_highlight(file_path, cache=None, collect_terms=False, timings=None):
+    """
+    Reads a single Python file and highlights it. When `collect_terms` is True the
+    search terms are extracted from the same read of the file.
+    Args:
+        file_path (str): Path to the Python file.
+        cache (FragmentCache, optional): Cache of previously highlighted fragments.
+        collect_terms (bool): Whether to extract search terms as well.
+        timings (dict, optional): If given, the seconds spent in each stage ("read",
+            "cache", "terms", "lex", "format") are added to it.
+    Returns:
+        tuple: (highlighted_code, terms), where terms is None unless `collect_terms`
+            is True (see extract_search_terms()).
+    """
+    read_ok = True
+    with timed(timings, "read"):
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 code_content = f.read()
         except Exception as e:
             print(f"Error reading file {file_path}: {e}")
             code_content = f"# Error reading file: {e}"
+            read_ok = False
+
+    with timed(timings, "cache"):
+        cache_key = cache.key_for(code_content) if cache is not None and read_ok else None
 
-        # Generate highlighted code (this will be a full HTML document snippet if full=True,
-        # or just the <div class="highlight">...</div> part if full=False)
-        # For embedding, we typically want full=False or to extract from full=True.
-        # The HtmlFormatter(full=True) includes <html>, <head>, <body> and <style> tags.
-        # We want just the highlighted code block.
-        # So, we use a formatter that does not generate a full document.
-        # The CSS is generated once and included in the main HTML shell.
-        highlighted_code = highlight(code_content, lexer, formatter)
-
-        # Create an accordion-like section for each file
-        html_sections.append(f"""
+    terms = None
+    if collect_terms and not read_ok:
+        terms = {"terms": [], "defs": []}
+    elif collect_terms:
+        with timed(timings, "terms"):
+            terms = cache.get_terms(cache_key) if cache_key is not None else None
+            if terms is None:
+                terms = extract_search_terms(code_content)
+                if cache_key is not None:
+                    cache.put_terms(cache_key, terms)
+
+    if cache_key is not None:
+        with timed(timings, "cache"):
+            highlighted_code = cache.get(cache_key)
+        if highlighted_code is not None:
+            return highlighted_code, terms
+
+    # Generate highlighted code (this will be a full HTML document snippet if full=True,
+    # or just the <div class="highlight">...</div> part if full=False)
+    # For embedding, we typically want full=False or to extract from full=True.
+    # The HtmlFormatter(full=True) includes <html>, <head>, <body> and <style> tags.
+    # We want just the highlighted code block.
+    # So, we use a formatter that does not generate a full document.
+    # The CSS is generated once and included in the main HTML shell.
+    with timed(timings, "lex"):
+        tokens = lex_source(code_content)
+    with timed(timings, "format"):
+        highlighted_code = render_tokens(tokens, "html")
+    if cache_key is not None:
+        with timed(timings, "cache"):
+            cache.put(cache_key, highlighted_code)
+    return highlighted_code, terms
+
+def highlight_file(file_path, cache=None):
+    """
+    Reads a single Python file and returns its syntax-highlighted HTML.
+    Args:
+        file_path (str): Path to the Python file.
+        cache (FragmentCache, optional): Cache of previously highlighted fragments.
+    Returns:
+        str: The highlighted code as a <div class="highlight">...</div> block.
+    """
+    return read_and_highlight(file_path, cache)[0]
+
+def _highlight_batch_in_worker(file_paths, cache, collect_terms, profile):
+    """
+    Runs read_and_highlight() on a batch of files in a worker process.
+    Returns the (highlighted_code, terms, timings) results plus the cache hits and
+    misses they caused, because the worker's copy of the cache is not shared with
+    the parent process.
+    """
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    results = []
+    for file_path in file_paths:
+        timings = {} if profile else None
+        highlighted_code, terms = read_and_highlight(file_path, cache, collect_terms, timings)
+        results.append((highlighted_code, terms, timings))
+    if cache is None:
+        return results, 0, 0
+    return results, cache.hits - hits, cache.misses - misses
+
+def iter_highlighted_files(file_paths, cache=None, executor=None, search_index=None, profiler=None):
+    """
+    Yields (file_path, highlighted_code) for each file, in sorted path order.
+    Args:
+        file_paths (list): A list of paths to Python files.
+        cache (FragmentCache, optional): Cache of previously highlighted fragments.
+        executor (ProcessPoolExecutor, optional): If given, reading and highlighting
+            are spread across its worker processes. The order of the results is
+            the same as in serial mode.
+        search_index (SearchIndex, optional): If given, the search terms of every
+            file are extracted in the same pass and added to it.
+        profiler (BuildProfiler, optional): If given, per-file stage timings are recorded.
+    """
+    sorted_paths = sorted(file_paths)
+    collect_terms = search_index is not None
+    if executor is None:
+        for file_path in sorted_paths:
+            timings = {} if profiler is not None else None
+            highlighted_code, terms = read_and_highlight(file_path, cache, collect_terms, timings)
+            if collect_terms:
+                search_index.add(file_path, terms)
+            if profiler is not None:
+                profiler.record(file_path, timings)
+            yield file_path, highlighted_code
+        return
+
+    # Files are sent to the workers in batches, and at most MAX_PENDING_BATCHES are
+    # in flight at once. Results are taken from the front of the queue, so they come
+    # out in input order no matter which worker finishes first.
+    pending = collections.deque()
+    try:
+        for start in range(0, len(sorted_paths), PARALLEL_CHUNKSIZE):
+            batch = sorted_paths[start:start + PARALLEL_CHUNKSIZE]
+            future = executor.submit(_highlight_batch_in_worker, batch, cache, collect_terms,
+                                     profiler is not None)
+            pending.append((batch, future))
+            if len(pending) >= MAX_PENDING_BATCHES:
+                yield from _collect_batch(pending.popleft(), cache, search_index, profiler)
+        while pending:
+            yield from _collect_batch(pending.popleft(), cache, search_index, profiler)
+    finally:
+        # Only reached with pending work if the caller stopped early.
+        for _, future in pending:
+            future.cancel()
+
+def _collect_batch(batch_and_future, cache, search_index, profiler):
+    """Waits for one batch from the pool and yields its (file_path, highlighted_code) pairs."""
+    batch, future = batch_and_future
+    results, hits, misses = future.result()
+    if cache is not None:
+        cache.hits += hits
+        cache.misses += misses
+    for file_path, (highlighted_code, terms, timings) in zip(batch, results):
+        if search_index is not None:
+            search_index.add(file_path, terms)
+        if profiler is not None:
+            profiler.record(file_path, timings)
+        yield file_path, highlighted_code
+
+class BuildProfiler:
+    """
+    Collects per-file timings of a build: reading, cache lookups, search terms,
+    lexing, HTML formatting and template assembly, plus the bytes each file adds
+    to the page. In parallel mode the per-file stages are measured inside the
+    worker processes, so their sum can exceed the wall-clock time of the build.
+    """
+
+    STAGES = ("read", "cache", "terms", "lex", "format", "assemble")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.files = collections.OrderedDict()  # file_path -> {"read": s, ..., "bytes": n}
+
+    def record(self, file_path, timings):
+        """Adds stage timings (seconds) for one file."""
+        entry = self.files.setdefault(file_path, {"bytes": 0})
+        for stage, seconds in timings.items():
+            entry[stage] = entry.get(stage, 0.0) + seconds
+
+    def add_bytes(self, file_path, size):
+        """Counts bytes of output produced for one file."""
+        self.record(file_path, {})
+        self.files[file_path]["bytes"] += size
+
+    def report(self, output_files=()):
+        """
+        Builds the profiling report.
+        Args:
+            output_files (list): Files written by the build; their sizes are reported.
+        Returns:
+            dict: Totals per stage and per output file, and one entry per script
+                sorted by total time (slowest first).
+        """
+        wall_seconds = time.perf_counter() - self.started
+        files = []
+        for file_path, entry in self.files.items():
+            row = {"path": file_path}
+            row.update({stage: round(entry.get(stage, 0.0), 6) for stage in self.STAGES})
+            row["total"] = round(sum(entry.get(stage, 0.0) for stage in self.STAGES), 6)
+            row["bytes"] = entry["bytes"]
+            files.append(row)
+        files.sort(key=lambda row: row["total"], reverse=True)
+        stage_totals = {stage: round(sum(row[stage] for row in files), 6) for stage in self.STAGES}
+        output_sizes = {path: os.path.getsize(path)
+                        for path in output_files if os.path.exists(path)}
+        return {
+            "wall_seconds": round(wall_seconds, 6),
+            "files_indexed": len(files),
+            "stage_seconds": stage_totals,
+            "per_file_seconds": round(sum(stage_totals.values()), 6),
+            "section_bytes": sum(row["bytes"] for row in files),
+            "output_bytes": output_sizes,
+            "total_output_bytes": sum(output_sizes.values()),
+            "files": files,
+        }
+
+    @staticmethod
+    def write(report, path):
+        """Writes the report as indented JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    @classmethod
+    def summary(cls, report, top_n=10):
+        """Returns a human-readable summary with the `top_n` slowest files."""
+        lines = [f"Build took {report['wall_seconds']:.3f} s for {report['files_indexed']} files "
+                 f"({report['total_output_bytes']:,} bytes written).",
+                 "Time per stage (summed over files):"]
+        per_file = report["per_file_seconds"] or 1.0
+        for stage in cls.STAGES:
+            seconds = report["stage_seconds"][stage]
+            lines.append(f"  {stage:<9}{seconds:9.3f} s  {100 * seconds / per_file:5.1f}%")
+        lines.append(f"Top {min(top_n, len(report['files']))} files by time:")
+        lines.append(f"  {'total ms':>9} {'lex ms':>8} {'format ms':>9} {'bytes':>9}  file")
+        for row in report["files"][:top_n]:
+            lines.append(f"  {1000 * row['total']:9.1f} {1000 * row['lex']:8.1f} "
+                         f"{1000 * row['format']:9.1f} {row['bytes']:9,}  {row['path']}")
+        return "\n".join(lines)
+
+def script_summary(file_path):
+    """Returns the label shown for a script in the index, e.g. 'main.py (custom_module_example)'."""
+    return f"{os.path.basename(file_path)} ({os.path.dirname(file_path) or 'root'})"
+
+class SearchIndex:
+    """
+    A compact inverted index from search terms to the scripts that contain them.
+
+    It is written as JSON with parallel, sorted `terms` and `postings` arrays, so the
+    page can find every term starting with a prefix by binary search.
+    """
+
+    def __init__(self):
+        self.entries = {}  # file_path -> terms as returned by extract_search_terms()
+
+    def add(self, file_path, terms):
+        """Adds (or replaces) the terms of one script."""
+        self.entries[file_path] = terms
+
+    def remove(self, file_path):
+        """Forgets a script that no longer exists."""
+        self.entries.pop(file_path, None)
+
+    def to_dict(self):
+        """Builds the JSON-serialisable inverted index."""
+        files = []
+        postings = collections.defaultdict(list)
+        for file_id, file_path in enumerate(sorted(self.entries)):
+            entry = self.entries[file_path]
+            files.append({"path": file_path.replace(os.sep, "/"),
+                          "summary": script_summary(file_path),
+                          "defs": entry["defs"]})
+            for term in entry["terms"]:
+                postings[term].append(file_id)
+        terms = sorted(postings)
+        return {"version": SEARCH_TERMS_VERSION, "files": files,
+                "terms": terms, "postings": [postings[term] for term in terms]}
+
+    def write(self, path):
+        """Writes the index as compact JSON."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+class ShardWriter:
+    """
+    Writes the highlighted code of each script to its own small fragment file.
+
+    In sharded mode index.html only contains the list of scripts; the browser
+    fetches a script's fragment the first time its <details> block is opened.
+    """
+
+    def __init__(self, fragments_dir=DEFAULT_FRAGMENTS_DIR):
+        self.fragments_dir = fragments_dir
+        self.written = set()
+
+    @staticmethod
+    def fragment_name(file_path):
+        """Returns a stable, URL-safe file name for the fragment of `file_path`."""
+        normalized = file_path.replace(os.sep, "/")
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", normalized).strip("_")
+        # The short hash keeps names unique when two paths map to the same slug.
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:8]
+        return f"{slug}-{digest}.html"
+
+    def write(self, file_path, highlighted_code):
+        """Writes one fragment and returns its URL relative to index.html."""
+        name = self.fragment_name(file_path)
+        path = os.path.join(self.fragments_dir, name)
+        os.makedirs(self.fragments_dir, exist_ok=True)
+        # Unchanged fragments are left alone so their modification time (and any
+        # HTTP caching based on it) survives a rebuild.
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                unchanged = f.read() == highlighted_code
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(highlighted_code)
+            os.replace(tmp_path, path)
+        self.written.add(name)
+        return f"{os.path.basename(os.path.normpath(self.fragments_dir))}/{name}"
+
+    def remove(self, file_path):
+        """Deletes the fragment of a script that no longer exists."""
+        name = self.fragment_name(file_path)
+        self.written.discard(name)
+        remove_with_precompressed(os.path.join(self.fragments_dir, name))
+
+    def remove_stale(self):
+        """Deletes fragments of scripts that were not written in this run."""
+        if not os.path.isdir(self.fragments_dir):
+            return
+        for name in os.listdir(self.fragments_dir):
+            if name.endswith(".html") and name not in self.written:
+                remove_with_precompressed(os.path.join(self.fragments_dir, name))
+
+    def fragment_paths(self):
+        """Returns the paths of all fragments written so far."""
+        return [os.path.join(self.fragments_dir, name) for name in sorted(self.written)]
+
+def render_script_section(file_path, highlighted_code, shard=None):
+    """
+    Returns the collapsible <details> section for one script.
+    If `shard` (a ShardWriter) is given, the highlighted code goes to a separate
+    fragment file and the section only references it.
+    """
+    if shard is not None:
+        fragment_url = html.escape(shard.write(file_path, highlighted_code))
+        return f"""
+        <div class="script-section">
+            <details data-fragment="{fragment_url}">
+                <summary>{script_summary(file_path)}</summary>
+                <div class="code-container"></div>
+            </details>
+        </div>
+        """
+
+    # Create an accordion-like section for each file
+    return f"""
         <div class="script-section">
             <details>
-                <summary>{os.path.basename(file_path)} ({os.path.dirname(file_path) or 'root'})</summary>
+                <summary>{script_summary(file_path)}</summary>
                 <div class="code-container">
                     {highlighted_code}
                 </div>
             </details>
         </div>
-        """)
-    return "\n".join(html_sections)
+        """
 
-def main():
-    """Main function to discover files and generate index.html."""
-    print("Generating index.html...")
+def iter_html_for_files(file_paths, category_title, cache=None, executor=None, shard=None,
+                        search_index=None, profiler=None):
+    """
+    Yields the HTML for a category of Python files piece by piece: first the
+    category heading, then one section per file as soon as it is highlighted.
+    Yields nothing if `file_paths` is empty.
+    """
+    if not file_paths:
+        return
 
-    # --- File Discovery ---
-    # Root .py files (excluding this script itself)
-    root_py_files = [f for f in glob.glob("*.py") if f != "generate_html_index.py"]
+    yield f"<h2>{category_title}</h2>"
 
-    # Files in custom_module_example/
-    custom_module_files = glob.glob("custom_module_example/*.py")
+    highlighted_files = iter_highlighted_files(file_paths, cache, executor, search_index, profiler)
+    for file_path, highlighted_code in highlighted_files:
+        if profiler is None:
+            yield render_script_section(file_path, highlighted_code, shard)
+            continue
+        timings = {}
+        with timed(timings, "assemble"):
+            section = render_script_section(file_path, highlighted_code, shard)
+        profiler.record(file_path, timings)
+        # In sharded mode the highlighted code is written to the file's fragment instead.
+        output = section + highlighted_code if shard is not None else section
+        profiler.add_bytes(file_path, len(output.encode('utf-8')))
+        yield section
 
-    # Files in tests/
-    test_files = glob.glob("tests/*.py")
+def generate_html_for_files(file_paths, category_title, cache=None, executor=None, shard=None):
+    """
+    Generates HTML for a list of Python files, including syntax-highlighted code.
+    Args:
+        file_paths (list): A list of paths to Python files.
+        category_title (str): The title for this category of files.
+        cache (FragmentCache, optional): If given, previously highlighted fragments are
+            reused and only files whose content changed are highlighted again.
+        executor (ProcessPoolExecutor, optional): If given, files are highlighted in parallel.
+        shard (ShardWriter, optional): If given, code is written to per-script fragment files.
+    Returns:
+        str: HTML string for the given files.
+    """
+    return "\n".join(iter_html_for_files(file_paths, category_title, cache, executor, shard))
 
+# Loads a script's highlighted code the first time its <details> block is opened.
+# `toggle` events do not bubble, so a single listener catches them in the capture phase.
+# Note: browsers block fetch() for pages opened from file://, so a sharded index
+# has to be served over HTTP (e.g. `python -m http.server`).
+LAZY_LOADER_SCRIPT = """    <script>
+        document.addEventListener("toggle", function (event) {
+            var details = event.target;
+            if (!details.open || !details.dataset.fragment || details.dataset.loaded) {
+                return;
+            }
+            details.dataset.loaded = "true";
+            var container = details.querySelector(".code-container");
+            container.textContent = "Loading...";
+            fetch(details.dataset.fragment)
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error(response.status + " " + response.statusText);
+                    }
+                    return response.text();
+                })
+                .then(function (fragment) { container.innerHTML = fragment; })
+                .catch(function (error) {
+                    container.textContent = "Could not load " + details.dataset.fragment + ": " + error;
+                    delete details.dataset.loaded;
+                });
+        }, true);
+    </script>
+"""
 
-    # --- HTML Structure and Content ---
-    pygments_css = get_pygments_css()
+# Search box shown above the script list in --search mode. The search index is only
+# downloaded once the box is used; like sharded fragments, it has to be served over HTTP.
+SEARCH_BOX_HTML = """        <div class="search-box">
+            <input type="search" id="script-search" data-index="{index_url}"
+                   placeholder="Search function and class names, identifiers and docstrings..." autocomplete="off">
+            <ul id="search-results"></ul>
+        </div>
+"""
+
+SEARCH_SCRIPT = """    <style>
+        .search-box input {
+            width: 100%;
+            box-sizing: border-box;
+            padding: 10px 12px;
+            font-size: 1em;
+            border: 1px solid #ddd;
+            border-radius: 5px;
+        }
+        #search-results {
+            list-style: none;
+            padding: 0;
+            margin: 8px 0 0 0;
+        }
+        #search-results li {
+            padding: 4px 0;
+        }
+        #search-results .search-defs {
+            color: #7f8c8d;
+            font-size: 0.9em;
+        }
+    </style>
+    <script>
+        document.addEventListener("DOMContentLoaded", function () {
+            var input = document.getElementById("script-search");
+            var results = document.getElementById("search-results");
+            var sections = {};
+            var indexPromise = null;
+            document.querySelectorAll(".script-section details").forEach(function (details) {
+                sections[details.querySelector("summary").textContent] = details;
+            });
+
+            function loadIndex() {
+                if (indexPromise === null) {
+                    indexPromise = fetch(input.dataset.index).then(function (response) {
+                        if (!response.ok) {
+                            throw new Error(response.status + " " + response.statusText);
+                        }
+                        return response.json();
+                    });
+                    indexPromise.catch(function () { indexPromise = null; });
+                }
+                return indexPromise;
+            }
+
+            // Index of the first term that is >= prefix (terms are sorted).
+            function lowerBound(terms, prefix) {
+                var low = 0, high = terms.length;
+                while (low < high) {
+                    var middle = (low + high) >> 1;
+                    if (terms[middle] < prefix) { low = middle + 1; } else { high = middle; }
+                }
+                return low;
+            }
 
-    # Generate HTML for each category
-    root_scripts_html = generate_html_for_files(root_py_files, "Root Scripts")
-    custom_module_html = generate_html_for_files(custom_module_files, "Custom Module Examples (custom_module_example/)")
-    test_scripts_html = generate_html_for_files(test_files, "Test Scripts (tests/)")
+            // Ids of the files that contain, for every word of the query, a term starting with it.
+            function search(index, query) {
+                var words = query.toLowerCase().match(/[a-z0-9_]+/g) || [];
+                var matches = null;
+                words.forEach(function (word) {
+                    var found = {};
+                    for (var i = lowerBound(index.terms, word);
+                         i < index.terms.length && index.terms[i].lastIndexOf(word, 0) === 0; i++) {
+                        index.postings[i].forEach(function (id) {
+                            if (matches === null || matches[id]) { found[id] = true; }
+                        });
+                    }
+                    matches = found;
+                });
+                return matches === null ? [] : Object.keys(matches).map(Number).sort(function (a, b) { return a - b; });
+            }
 
-    html_template = f"""<!DOCTYPE html>
+            function showResults(index, ids) {
+                results.innerHTML = "";
+                ids.slice(0, 50).forEach(function (id) {
+                    var file = index.files[id];
+                    var item = document.createElement("li");
+                    var link = document.createElement("a");
+                    link.href = "#";
+                    link.textContent = file.summary;
+                    link.addEventListener("click", function (event) {
+                        event.preventDefault();
+                        var details = sections[file.summary];
+                        if (details) {
+                            details.open = true;
+                            details.scrollIntoView({behavior: "smooth"});
+                        }
+                    });
+                    item.appendChild(link);
+                    if (file.defs.length) {
+                        var defs = document.createElement("span");
+                        defs.className = "search-defs";
+                        defs.textContent = " \u2014 " + file.defs.slice(0, 8).join(", ");
+                        item.appendChild(defs);
+                    }
+                    results.appendChild(item);
+                });
+            }
+
+            input.addEventListener("focus", loadIndex);
+            input.addEventListener("input", function () {
+                var query = input.value;
+                loadIndex().then(function (index) {
+                    if (input.value === query) {  // Ignore answers to outdated queries.
+                        showResults(index, search(index, query));
+                    }
+                }).catch(function (error) {
+                    results.textContent = "Could not load " + input.dataset.index + ": " + error;
+                });
+            });
+        });
+    </script>
+"""
+
+def render_page_header(pygments_css, extra_head="", extra_body=""):
+    """
+    Returns the start of index.html, up to where the script sections begin.
+    `extra_head` is inserted at the end of the <head> element and `extra_body`
+    between the page title and the script list.
+    """
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -163,27 +887,640 @@ def main():
         }}
         {pygments_css}
     </style>
-</head>
+{extra_head}</head>
 <body>
     <div class="container">
         <h1>Index of Python Learning Scripts</h1>
-        <div class="script-list">
-            {root_scripts_html}
-            {custom_module_html}
-            {test_scripts_html}
+{extra_body}        <div class="script-list">
+            """
+
+# The end of index.html, written after the last script section.
+PAGE_FOOTER = """
         </div>
     </div>
 </body>
 </html>
 """
 
+def iter_index_page(categories, pygments_css, cache=None, executor=None, shard=None, extra_head="",
+                    search_index=None, search_index_url=DEFAULT_SEARCH_INDEX, profiler=None):
+    """
+    Yields index.html piece by piece.
+    Args:
+        categories (list): (category_title, file_paths) pairs, in page order.
+        pygments_css (str): CSS definitions for the highlighted code.
+        cache (FragmentCache, optional): Cache of previously highlighted fragments.
+        executor (ProcessPoolExecutor, optional): If given, files are highlighted in parallel.
+        shard (ShardWriter, optional): If given, code is written to per-script fragment
+            files that the page loads lazily.
+        extra_head (str): Markup inserted at the end of the <head> element.
+        search_index (SearchIndex, optional): If given, the search terms of every file
+            are added to it and the page gets a search box that loads `search_index_url`.
+        profiler (BuildProfiler, optional): If given, per-file timings and sizes are recorded.
+    """
+    category_chunks = (iter_html_for_files(file_paths, category_title, cache, executor, shard,
+                                           search_index, profiler)
+                       for category_title, file_paths in categories)
+    extra_head, extra_body = page_extras(extra_head, shard is not None,
+                                         search_index_url if search_index is not None else None)
+    return assemble_page(category_chunks, pygments_css, extra_head, extra_body)
+
+def page_extras(extra_head, sharded, search_index_url):
+    """Returns the (extra_head, extra_body) markup for the enabled page features."""
+    extra_body = ""
+    if sharded:
+        extra_head += LAZY_LOADER_SCRIPT
+    if search_index_url is not None:
+        extra_head += SEARCH_SCRIPT
+        extra_body = SEARCH_BOX_HTML.format(index_url=html.escape(search_index_url))
+    return extra_head, extra_body
+
+def assemble_page(category_chunks, pygments_css, extra_head="", extra_body=""):
+    """
+    Yields the page header, the pieces of every category (as produced by
+    iter_html_for_files) and the page footer, with the same spacing as a
+    page built in one go.
+    """
+    yield render_page_header(pygments_css, extra_head, extra_body)
+    for i, chunks in enumerate(category_chunks):
+        if i > 0:
+            yield "\n            "
+        for j, chunk in enumerate(chunks):
+            yield chunk if j == 0 else "\n" + chunk
+    yield PAGE_FOOTER
+
+def write_index(output_path, chunks, stream=False):
+    """
+    Writes the pieces of a page to `output_path`.
+    Args:
+        output_path (str): Path of the file to write.
+        chunks (iterable): The pieces of the page, in order.
+        stream (bool): If True, every piece is written to disk as soon as it is
+            produced, so memory use stays flat however large the page is. The page
+            is written to a temporary file that replaces `output_path` only once it
+            is complete. If False, the whole page is assembled in memory first.
+    """
+    if not stream:
+        page = "".join(chunks)
+        with open(output_path, "w", encoding='utf-8') as f:
+            f.write(page)
+        return
+
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_stylesheet(pygments_css, output_dir="."):
+    """
+    Writes the Pygments CSS to an external stylesheet named after a hash of its
+    content (pygments-<hash>.css). The name changes whenever the CSS changes, so
+    browsers can cache the file forever. Stylesheets from older builds are removed;
+    they are recognised by STYLESHEET_MARKER, so other pygments-*.css files are kept.
+    Returns:
+        str: The file name of the stylesheet, relative to `output_dir`.
+    """
+    content = STYLESHEET_MARKER + pygments_css
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+    name = f"pygments-{digest}.css"
+    path = os.path.join(output_dir, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    for old_name in glob.glob(os.path.join(glob.escape(output_dir), "pygments-*.css")):
+        if os.path.basename(old_name) != name and is_generated_stylesheet(old_name):
+            remove_with_precompressed(old_name)
+    return name
+
+def is_generated_stylesheet(path):
+    """Returns True if the file at `path` was written by write_stylesheet()."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read(len(STYLESHEET_MARKER)) == STYLESHEET_MARKER
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def stylesheet_link(name):
+    """Returns the <link> element for an external stylesheet."""
+    return f'    <link rel="stylesheet" href="{html.escape(name)}">\n'
+
+def precompress_file(path):
+    """
+    Writes gzip (.gz) and, if the lzma module is available, xz (.xz) copies of a
+    file, so a static web server can send precompressed bytes. Copies that are
+    already newer than the file are left alone.
+    Returns:
+        list: Paths of the copies that were (re)written.
+    """
+    compressors = [(".gz", lambda f: gzip.GzipFile(filename="", mode="wb", fileobj=f,
+                                                   compresslevel=9, mtime=0))]
+    if lzma is not None:
+        compressors.append((".xz", lambda f: lzma.LZMAFile(f, mode="wb", preset=9)))
+
+    source_mtime = os.stat(path).st_mtime_ns
+    written = []
+    for suffix, open_compressed in compressors:
+        target = path + suffix
+        try:
+            if os.stat(target).st_mtime_ns >= source_mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        tmp_path = f"{target}.tmp"
+        with open(path, 'rb') as source, open(tmp_path, 'wb') as raw:
+            with open_compressed(raw) as compressed:
+                shutil.copyfileobj(source, compressed, 1024 * 1024)
+        os.replace(tmp_path, target)
+        written.append(target)
+    return written
+
+def precompress_outputs(paths):
+    """Precompresses every file in `paths` and returns how many copies were written."""
+    return sum(len(precompress_file(path)) for path in paths)
+
+def remove_with_precompressed(path):
+    """Deletes a file together with its precompressed copies, ignoring missing files."""
+    for candidate in (path,) + tuple(path + suffix for suffix in PRECOMPRESSED_SUFFIXES):
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+
+class IndexWatcher:
+    """
+    Keeps index.html up to date while scripts are being edited.
+
+    The rendered section of every script is kept in memory. Each poll compares the
+    modification time and size of every script with the previous poll, highlights
+    only the scripts that were added or changed, and reassembles the page from the
+    sections in memory.
+    """
+
+    def __init__(self, discover, output_path="index.html", cache=None, shard=None,
+                 pygments_css=None, extra_head="", on_rebuild=None, search_index_path=None):
+        """
+        Args:
+            discover (callable): Returns the (category_title, file_paths) pairs to index.
+            output_path (str): Path of the page to write.
+            cache (FragmentCache, optional): Cache of previously highlighted fragments.
+            shard (ShardWriter, optional): If given, the page is written in sharded mode.
+            pygments_css (str, optional): CSS inlined into the page. Defaults to the
+                Pygments CSS; pass "" when it is linked through `extra_head` instead.
+            extra_head (str): Markup inserted at the end of the <head> element.
+            on_rebuild (callable, optional): Called without arguments after each rebuild.
+            search_index_path (str, optional): If given, a search index is kept up to
+                date at this path (relative to the page) and the page gets a search box.
+        """
+        self.discover = discover
+        self.output_path = output_path
+        self.cache = cache
+        self.shard = shard
+        self.pygments_css = get_pygments_css() if pygments_css is None else pygments_css
+        self.extra_head = extra_head
+        self.on_rebuild = on_rebuild
+        self.search_index_path = search_index_path
+        self.search_index = SearchIndex() if search_index_path is not None else None
+        self.categories = []
+        self.signatures = {}  # file_path -> (mtime_ns, size) seen at the last poll
+        self.sections = {}    # file_path -> rendered <details> section
+
+    @staticmethod
+    def _signature(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        """
+        Checks all scripts once and rebuilds the page if anything changed.
+        Returns:
+            tuple: (changed_paths, removed_paths), both sorted lists.
+        """
+        categories = [(title, sorted(paths)) for title, paths in self.discover()]
+        signatures = {}
+        for _, file_paths in categories:
+            for file_path in file_paths:
+                signatures[file_path] = self._signature(file_path)
+
+        changed = sorted(path for path, signature in signatures.items()
+                         if self.signatures.get(path) != signature or path not in self.sections)
+        removed = sorted(set(self.signatures) - set(signatures))
+        if not changed and not removed and categories == self.categories:
+            return [], []
+
+        for file_path in removed:
+            del self.sections[file_path]
+            if self.shard is not None:
+                self.shard.remove(file_path)
+            if self.search_index is not None:
+                self.search_index.remove(file_path)
+        highlighted_files = iter_highlighted_files(changed, self.cache,
+                                                   search_index=self.search_index)
+        for file_path, highlighted_code in highlighted_files:
+            self.sections[file_path] = render_script_section(file_path, highlighted_code,
+                                                             self.shard)
+        self.signatures = signatures
+        self.categories = categories
+
+        category_chunks = ([f"<h2>{title}</h2>"] + [self.sections[path] for path in file_paths]
+                           if file_paths else []
+                           for title, file_paths in categories)
+        extra_head, extra_body = page_extras(self.extra_head, self.shard is not None,
+                                             self.search_index_path)
+        write_index(self.output_path,
+                    assemble_page(category_chunks, self.pygments_css, extra_head, extra_body),
+                    stream=True)
+        if self.search_index is not None:
+            self.search_index.write(os.path.join(os.path.dirname(self.output_path),
+                                                 self.search_index_path))
+        if self.on_rebuild is not None:
+            self.on_rebuild()
+        return changed, removed
+
+    def run(self, interval=1.0):
+        """Polls every `interval` seconds until interrupted with Ctrl+C."""
+        print(f"Watching for changes every {interval} s (press Ctrl+C to stop)...")
+        try:
+            while True:
+                changed, removed = self.poll()
+                if changed or removed:
+                    print(f"[{time.strftime('%H:%M:%S')}] {self.output_path} rebuilt: "
+                          f"{len(changed)} changed, {len(removed)} removed.")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+
+def parse_args(argv=None):
+    """Parses the command-line options of the generator."""
+    parser = argparse.ArgumentParser(
+        description="Generate index.html for the Python scripts in this repository.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="directory for cached highlighted fragments "
+                             f"(default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="highlight every file again instead of reusing cached fragments")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes used for highlighting "
+                             "(0 = one per CPU; default: 1)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write each script section to disk as soon as it is highlighted "
+                             "instead of building the whole page in memory first")
+    parser.add_argument("--shard", action="store_true",
+                        help=f"write each script's highlighted code to {DEFAULT_FRAGMENTS_DIR}/ "
+                             "and load it only when its section is opened")
+    parser.add_argument("--external-css", action="store_true",
+                        help="write the Pygments CSS to a content-hashed pygments-<hash>.css "
+                             "instead of inlining it into the page")
+    parser.add_argument("--precompress", action="store_true",
+                        help="also write .gz (and .xz where available) copies of every output file")
+    parser.add_argument("--search", action="store_true",
+                        help="write a search index of names and docstrings to "
+                             f"{DEFAULT_SEARCH_INDEX} and add a search box to the page")
+    parser.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                        help="skip paths matching this .gitignore-style pattern (can be repeated)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild the page whenever a script is added, "
+                             "changed or removed")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between checks for changes in --watch mode (default: 1.0)")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_REPORT, metavar="REPORT",
+                        help="record per-file timings and output sizes, write them as JSON "
+                             f"to REPORT (default: {DEFAULT_PROFILE_REPORT}) and print the "
+                             "slowest files")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="number of files listed in the --profile summary (default: 10)")
+    parser.add_argument("--preview", metavar="FILE",
+                        help="instead of generating index.html, print FILE highlighted for the "
+                             "terminal")
+    parser.add_argument("--preview-format", choices=sorted(OUTPUT_FORMATTERS), default="ansi",
+                        help="output format used by --preview (default: ansi)")
+    parser.add_argument("--benchmark", type=int, metavar="N", default=0,
+                        help="instead of generating index.html, compare serial and parallel "
+                             "highlighting on a synthetic tree of N scripts")
+    return parser.parse_args(argv)
+
+def _write_synthetic_scripts(directory, num_files):
+    """Writes `num_files` generated Python scripts to `directory` and returns their paths."""
+    paths = []
+    for i in range(num_files):
+        lines = [f'"""Synthetic benchmark module number {i}."""', "import os", ""]
+        for j in range(10):
+            lines += [
+                f"class Shape{j}:",
+                f'    """Shape number {j} of module {i}."""',
+                "    def __init__(self, size):",
+                f"        self.size = size * {j + 1}",
+                "",
+                "    def area(self):",
+                f"        return [self.size ** 2 for _ in range({j})]  # list comprehension",
+                "",
+            ]
+        path = os.path.join(directory, f"script_{i:05d}.py")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        paths.append(path)
+    return paths
+
+def benchmark_parallel_highlighting(num_files, jobs):
+    """
+    Times serial and parallel highlighting of a synthetic tree of scripts.
+    The fragment cache is disabled so that every file is really highlighted.
+    Args:
+        num_files (int): Number of synthetic scripts to generate.
+        jobs (int): Number of worker processes for the parallel run.
+    Returns:
+        tuple: (serial_seconds, parallel_seconds)
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="index_benchmark_")
+    try:
+        paths = _write_synthetic_scripts(tmp_dir, num_files)
+        print(f"Benchmark: highlighting {num_files} synthetic scripts (cpu_count={os.cpu_count()})")
+
+        start = time.perf_counter()
+        serial_html = generate_html_for_files(paths, "Benchmark")
+        serial_seconds = time.perf_counter() - start
+        print(f"  serial:             {serial_seconds:8.2f} s")
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parallel_html = generate_html_for_files(paths, "Benchmark", executor=executor)
+        parallel_seconds = time.perf_counter() - start
+        print(f"  parallel (jobs={jobs:<2}): {parallel_seconds:8.2f} s "
+              f"(speedup x{serial_seconds / parallel_seconds:.2f})")
+
+        if parallel_html != serial_html:
+            print("  WARNING: parallel output differs from serial output!")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return serial_seconds, parallel_seconds
+
+# Patterns that are always ignored during discovery, in addition to .gitignore.
+DEFAULT_IGNORE_PATTERNS = (
+    ".git/", ".hg/", ".svn/", "__pycache__/", ".venv/", "venv/", ".tox/", ".nox/",
+    "node_modules/", "*.egg-info/", f"{DEFAULT_CACHE_DIR}/", f"/{DEFAULT_FRAGMENTS_DIR}/",
+)
+
+# Titles of well-known directories; other directories get a generic title.
+CATEGORY_TITLES = {
+    "": "Root Scripts",
+    "custom_module_example": "Custom Module Examples (custom_module_example/)",
+    "tests": "Test Scripts (tests/)",
+}
+
+# Scripts that are never indexed (relative to the root).
+EXCLUDED_SCRIPTS = {"generate_html_index.py"}
+
+class IgnoreRules:
+    """
+    Decides which paths to skip during discovery, using .gitignore-style patterns.
+
+    Supported syntax: `#` comments, `!` to re-include, a trailing `/` to match only
+    directories, a leading or inner `/` to anchor the pattern to the root, and the
+    wildcards `*`, `?`, `[...]` and `**`. As in git, the last matching pattern wins,
+    and nothing inside an ignored directory can be re-included (it is never scanned).
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []  # (regex, negated, directories_only)
+        for pattern in patterns:
+            self.add(pattern)
+
+    @classmethod
+    def from_gitignore(cls, root=".", extra_patterns=()):
+        """Builds the rules from DEFAULT_IGNORE_PATTERNS, `root`/.gitignore and `extra_patterns`."""
+        patterns = list(DEFAULT_IGNORE_PATTERNS)
+        try:
+            with open(os.path.join(root, ".gitignore"), 'r', encoding='utf-8') as f:
+                patterns.extend(f.read().splitlines())
+        except OSError:
+            pass
+        patterns.extend(extra_patterns)
+        return cls(patterns)
+
+    def add(self, pattern):
+        """Adds one pattern line. Blank lines and comments are ignored."""
+        pattern = pattern.rstrip()
+        if not pattern or pattern.startswith("#"):
+            return
+        negated = pattern.startswith("!")
+        if negated:
+            pattern = pattern[1:]
+        if pattern.startswith("\\"):
+            pattern = pattern[1:]  # "\#file" or "\!file" match names starting with # or !
+        directories_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if not pattern:
+            return
+        anchored = "/" in pattern
+        regex = self._translate(pattern.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex  # matches the name at any depth
+        self.rules.append((re.compile(regex + r"\Z"), negated, directories_only))
+
+    @staticmethod
+    def _translate(pattern):
+        """Translates a glob pattern (with `**`) into a regular expression."""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                parts.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("**", i):
+                parts.append(".*")
+                i += 2
+            elif pattern[i] == "*":
+                parts.append("[^/]*")
+                i += 1
+            elif pattern[i] == "?":
+                parts.append("[^/]")
+                i += 1
+            elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+                end = pattern.index("]", i + 2)
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+            else:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+        return "".join(parts)
+
+    def is_ignored(self, relative_path, is_dir):
+        """
+        Returns True if `relative_path` (relative to the root, with "/" separators)
+        should be skipped.
+        """
+        ignored = False
+        for regex, negated, directories_only in self.rules:
+            if directories_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                ignored = not negated
+        return ignored
+
+def iter_script_directories(root=".", ignore=None):
+    """
+    Walks the tree below `root` with os.scandir and yields, directory by directory,
+    (relative_dir, script_names) for every directory that contains .py files.
+    Directories are visited depth-first in name order, so the result is stable.
+    Ignored directories are skipped without being opened, and symbolic links to
+    directories are not followed.
+    """
+    ignore = ignore if ignore is not None else IgnoreRules()
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative_dir) if relative_dir else root) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Error scanning directory {relative_dir or root}: {e}")
+            continue
+
+        scripts = []
+        subdirectories = []
+        for entry in entries:
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            # DirEntry.is_dir()/is_file() usually answer from the directory listing
+            # itself, without an extra stat() call per entry.
+            if entry.is_dir(follow_symlinks=False):
+                if not ignore.is_ignored(relative_path, True):
+                    subdirectories.append(relative_path)
+            elif (entry.name.endswith(".py") and entry.is_file()
+                  and not ignore.is_ignored(relative_path, False)):
+                scripts.append(entry.name)
+        if scripts:
+            yield relative_dir, scripts
+        # Reversed, so the stack pops the subdirectories in name order.
+        stack.extend(reversed(subdirectories))
+
+def discover_categories(root=".", ignore=None):
+    """
+    Finds the Python scripts to index, one category per directory.
+    Categories are produced lazily, while the tree is being scanned.
+    Args:
+        root (str): Directory to scan.
+        ignore (IgnoreRules, optional): Paths to skip. Defaults to the rules from
+            `root`/.gitignore plus DEFAULT_IGNORE_PATTERNS.
+    Yields:
+        tuple: (category_title, file_paths), in page order.
+    """
+    # --- File Discovery ---
+    if ignore is None:
+        ignore = IgnoreRules.from_gitignore(root)
+    for relative_dir, scripts in iter_script_directories(root, ignore):
+        if not relative_dir:
+            # Root .py files (excluding this script itself)
+            scripts = [name for name in scripts if name not in EXCLUDED_SCRIPTS]
+            if not scripts:
+                continue
+        file_paths = [os.path.join(relative_dir, name) if relative_dir else name
+                      for name in scripts]
+        if root != os.curdir:
+            file_paths = [os.path.join(root, file_path) for file_path in file_paths]
+        title = CATEGORY_TITLES.get(relative_dir, f"Scripts in {relative_dir}/")
+        yield title, file_paths
+
+def main(argv=None):
+    """Main function to discover files and generate index.html."""
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.benchmark:
+        benchmark_parallel_highlighting(args.benchmark, max(jobs, 2))
+        return
+    if args.preview:
+        print(render_file(args.preview, (args.preview_format,))[args.preview_format], end="")
+        return
+
+    print("Generating index.html...")
+    cache = None if args.no_cache else FragmentCache(args.cache_dir)
+
+    # --- HTML Structure and Content ---
+    pygments_css = get_pygments_css()
+    extra_head = ""
+    stylesheet = None
+    if args.external_css:
+        stylesheet = write_stylesheet(pygments_css)
+        extra_head = stylesheet_link(stylesheet)
+        pygments_css = ""
+    shard = ShardWriter(DEFAULT_FRAGMENTS_DIR) if args.shard else None
+
+    search_index = SearchIndex() if args.search else None
+
+    def output_files():
+        files = ["index.html"]
+        if stylesheet is not None:
+            files.append(stylesheet)
+        if search_index is not None:
+            files.append(DEFAULT_SEARCH_INDEX)
+        if shard is not None:
+            files.extend(shard.fragment_paths())
+        return files
+
+    ignore = IgnoreRules.from_gitignore(os.curdir, args.ignore)
+
+    if args.watch:
+        on_rebuild = (lambda: precompress_outputs(output_files())) if args.precompress else None
+        watcher = IndexWatcher(functools.partial(discover_categories, os.curdir, ignore),
+                               "index.html", cache, shard, pygments_css, extra_head, on_rebuild,
+                               DEFAULT_SEARCH_INDEX if args.search else None)
+        watcher.run(args.interval)
+        return
+
+    profiler = BuildProfiler() if args.profile else None
+    categories = discover_categories(os.curdir, ignore)
+
     # --- Output ---
+    # The page is generated category by category while it is written.
+    # With more than one job, a single pool of worker processes is shared by all categories.
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    # Names the step in progress for the error message. index.html is streamed while the
+    # scripts are highlighted, so a highlighting failure is reported as writing it.
+    step = "writing index.html"
     try:
-        with open("index.html", "w", encoding='utf-8') as f:
-            f.write(html_template)
+        chunks = iter_index_page(categories, pygments_css, cache, executor, shard, extra_head,
+                                 search_index, profiler=profiler)
+        write_index("index.html", chunks, stream=args.stream)
         print("index.html generated successfully.")
+        if search_index is not None:
+            step = f"writing {DEFAULT_SEARCH_INDEX}"
+            search_index.write(DEFAULT_SEARCH_INDEX)
+            print(f"Search index of {len(search_index.entries)} scripts written to "
+                  f"{DEFAULT_SEARCH_INDEX}.")
+        if stylesheet is not None:
+            print(f"Pygments CSS written to {stylesheet}.")
+        if shard is not None:
+            step = "removing stale fragments"
+            shard.remove_stale()
+            print(f"{len(shard.written)} fragments written to {shard.fragments_dir}/.")
+        if args.precompress:
+            step = "precompressing the output files"
+            print(f"{precompress_outputs(output_files())} precompressed copies written.")
+        if cache is not None:
+            print(f"Fragment cache: {cache.hits} reused, {cache.misses} highlighted.")
+        if profiler is not None:
+            step = f"writing the profile report {args.profile}"
+            report = profiler.report(output_files())
+            profiler.write(report, args.profile)
+            print(profiler.summary(report, args.profile_top))
+            print(f"Profile report written to {args.profile}.")
     except Exception as e:
-        print(f"Error writing index.html: {e}")
+        print(f"Error {step}: {e}")
+        raise SystemExit(1) from e
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
 if __name__ == "__main__":
     main()
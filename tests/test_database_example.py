@@ -0,0 +1,240 @@
+import unittest
+from unittest import mock
+import sys
+import os
+import tempfile
+import threading
+
+# Add the parent directory (project root) to the Python path so that
+# 'database_example.py' can be imported when running tests from 'tests/'.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+import database_example
+from database_example import Base, User
+
+
+class TestDatabaseExample(unittest.TestCase):
+    """
+    Test cases for the helpers in database_example.py, each against a fresh in-memory database.
+    """
+
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def count_users(self):
+        """Helper that returns the number of rows in the users table."""
+        with self.Session() as db:
+            return db.scalar(select(func.count()).select_from(User))
+
+    # --- Tests for bulk_insert_users ---
+    def test_bulk_insert_users_in_batches(self):
+        """Test that every row is inserted across several batches and is readable via the ORM."""
+        users = ({"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(25))
+        inserted = database_example.bulk_insert_users(users, bind=self.engine, batch_size=10)
+        self.assertEqual(inserted, 25)
+        self.assertEqual(self.count_users(), 25)
+        with self.Session() as db:
+            user = db.query(User).filter(User.email == "user24@example.com").one()
+            self.assertEqual(user.name, "User 24")
+
+    def test_bulk_insert_users_is_all_or_nothing(self):
+        """Test that a duplicate email rolls back the whole load."""
+        users = [{"name": "A", "email": "a@example.com"}, {"name": "B", "email": "b@example.com"},
+                 {"name": "A again", "email": "a@example.com"}]
+        with self.assertRaises(IntegrityError):
+            database_example.bulk_insert_users(users, bind=self.engine, batch_size=2)
+        self.assertEqual(self.count_users(), 0)
+
+
+    # --- Tests for iter_users ---
+    def test_iter_users_walks_in_id_order_across_pages(self):
+        """Test that keyset pages cover every user once, in id order, with a partial last page."""
+        database_example.bulk_insert_users(database_example._generated_users(25), bind=self.engine)
+        with self.Session() as db:
+            db.delete(db.get(User, 10))
+            db.commit()
+            ids = [user.id for user in database_example.iter_users(db, page_size=10)]
+        self.assertEqual(ids, [i for i in range(1, 26) if i != 10])
+
+    def test_iter_users_empty_table(self):
+        """Test that an empty table yields nothing."""
+        with self.Session() as db:
+            self.assertEqual(list(database_example.iter_users(db)), [])
+
+
+    # --- Tests for UserLookupCache ---
+    def make_cache(self, **kwargs):
+        """Helper that loads five users and returns a UserLookupCache listening to self.Session."""
+        cache = database_example.UserLookupCache(**kwargs)
+        cache.listen(self.Session)
+        database_example.bulk_insert_users(database_example._generated_users(5), bind=self.engine)
+        return cache
+
+    def test_user_lookup_cache_hits_without_querying(self):
+        """Test that a repeated lookup is served from the cache, attached to the new session."""
+        cache = self.make_cache()
+        with self.Session() as db:
+            self.assertEqual(cache.get_by_name(db, "User 1").email, "user1@example.com")
+            self.assertIsNone(cache.get_by_name(db, "Nobody"))
+        with self.Session() as db, \
+                mock.patch.object(db, "query", side_effect=AssertionError("queried")):
+            user = cache.get_by_name(db, "User 1")
+            self.assertEqual(user.email, "user1@example.com")
+            self.assertIn(user, db)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_user_lookup_cache_invalidated_on_update_and_delete(self):
+        """Test that committed changes made through a listened session are never served stale."""
+        cache = self.make_cache()
+        with self.Session() as db:
+            cache.get_by_name(db, "User 1").email = "new@example.com"
+            db.commit()
+        with self.Session() as db:
+            self.assertEqual(cache.get_by_name(db, "User 1").email, "new@example.com")
+            db.delete(cache.get_by_name(db, "User 1"))
+            db.commit()
+        with self.Session() as db:
+            self.assertIsNone(cache.get_by_name(db, "User 1"))
+            self.assertIsNone(cache.get_by_email(db, "new@example.com"))
+        self.assertEqual(cache.hits, 1)
+
+    def test_user_lookup_cache_evicts_lru_and_expires(self):
+        """Test that the least recently used entry is evicted and entries expire after the TTL."""
+        cache = self.make_cache(maxsize=2, ttl=10)
+        with self.Session() as db, \
+                mock.patch.object(database_example.time, "monotonic", return_value=100.0) as clock:
+            for name in ["User 0", "User 1", "User 0", "User 2"]:
+                cache.get_by_name(db, name)
+            self.assertEqual(sorted(key for key in cache._entries),
+                             [("name", "User 0"), ("name", "User 2")])
+            clock.return_value = 111.0
+            cache.get_by_name(db, "User 0")
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def query_then(self, invalidate, user):
+        """Helper that stands in for db.query: it runs `invalidate`, then finds `user`."""
+        def query(*_args):
+            invalidate()
+            return mock.Mock(**{"filter.return_value.first.return_value": user})
+        return query
+
+    def test_user_lookup_cache_does_not_store_reads_invalidated_in_flight(self):
+        """Test that a lookup whose user is invalidated mid-query doesn't cache the old values."""
+        cache = self.make_cache()
+        with self.Session() as db:
+            user = db.query(User).filter(User.name == "User 1").one()
+            committed = mock.Mock(info={"user_cache_changed": {user.id}})
+            # An uncommitted session's flush, another session's commit, and a bulk UPDATE.
+            invalidations = {"flush": lambda: cache.invalidate(user),
+                             "commit": lambda: cache._after_commit(committed),
+                             "clear": cache.clear}
+            for name, invalidate in invalidations.items():
+                with self.subTest(invalidation=name):
+                    query = self.query_then(invalidate, user)
+                    with mock.patch.object(db, "query", side_effect=query):
+                        self.assertIs(cache.get_by_name(db, "User 1"), user)
+                    self.assertEqual(len(cache), 0)
+            cache.get_by_name(db, "User 1")
+            self.assertEqual(len(cache), 1)
+            self.assertEqual((cache._loading, cache._invalidated), (0, {}))
+
+
+    # --- Tests for create_sqlite_engine ---
+    def test_create_sqlite_engine_sets_pragmas_on_every_connection(self):
+        """Test that each pooled connection gets the pragmas and the pool has the requested size."""
+        with tempfile.TemporaryDirectory() as directory:
+            file_engine = database_example.create_sqlite_engine(
+                os.path.join(directory, "users.db"), cache_size=-1024, pool_size=2, max_overflow=0)
+            with file_engine.connect() as first, file_engine.connect() as second:
+                for connection in (first, second):
+                    pragmas = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                               for name in ("journal_mode", "synchronous", "mmap_size",
+                                            "cache_size")}
+                    # synchronous 1 is NORMAL.
+                    self.assertEqual(pragmas, {"journal_mode": "wal", "synchronous": 1,
+                                               "mmap_size": database_example.SQLITE_MMAP_SIZE,
+                                               "cache_size": -1024})
+            self.assertEqual(file_engine.pool.size(), 2)
+            file_engine.dispose()
+
+    def test_create_sqlite_engine_merges_connect_args(self):
+        """Test that connect_args from the caller are kept and get the busy timeout added."""
+        with mock.patch.object(database_example, "create_engine", wraps=create_engine) as create:
+            database_example.create_sqlite_engine("users.db", busy_timeout=5,
+                                                  connect_args={"uri": False}).dispose()
+        self.assertEqual(create.call_args.kwargs["connect_args"], {"uri": False, "timeout": 5})
+
+    def test_create_sqlite_engine_rejects_unknown_modes(self):
+        """Test that an invalid journal or synchronous mode is rejected before reaching SQL."""
+        with self.assertRaises(ValueError):
+            database_example.create_sqlite_engine("users.db", journal_mode="WAL; DROP TABLE users")
+        with self.assertRaises(ValueError):
+            database_example.create_sqlite_engine("users.db", synchronous="sometimes")
+
+
+    # --- Tests for benchmark_sqlite_concurrency ---
+    def test_sqlite_benchmark_writer_skips_missing_users(self):
+        """Test that the benchmark writer skips ids with no user instead of failing on them."""
+        database_example.bulk_insert_users(database_example._generated_users(2), bind=self.engine)
+        stop = threading.Event()
+        timer = threading.Timer(0.2, stop.set)
+        timer.start()
+        done, errors = database_example._sqlite_benchmark_worker(self.engine, stop, 20, 0, True)
+        timer.join()
+        self.assertGreater(done, 0)
+        self.assertEqual(errors, 0)
+
+    # --- Tests for run_user_load ---
+    def test_run_user_load_with_scoped_sessions(self):
+        """Test that several threads read and update users through one scoped_session cleanly."""
+        with tempfile.TemporaryDirectory() as directory:
+            file_engine = database_example.create_sqlite_engine(os.path.join(directory, "users.db"))
+            Base.metadata.create_all(bind=file_engine)
+            database_example.bulk_insert_users(database_example._generated_users(50),
+                                               bind=file_engine)
+            registry = scoped_session(sessionmaker(bind=file_engine))
+            ops_per_second, p50, p99, errors = database_example.run_user_load(
+                registry, threads=3, duration=0.3, read_ratio=0.5)
+            self.assertGreater(ops_per_second, 0)
+            self.assertLessEqual(p50, p99)
+            self.assertEqual(errors, 0)
+            with file_engine.connect() as connection:
+                # Updated emails look like "user7.1.3@example.com".
+                changed = connection.scalar(select(func.count()).select_from(User)
+                                            .where(User.email.like("user%.%.%@example.com")))
+            self.assertGreater(changed, 0)
+            file_engine.dispose()
+
+
+    def test_run_user_load_survives_deleted_users(self):
+        """Test that a deleted id is skipped by default, and read as a miss when passed in."""
+        with tempfile.TemporaryDirectory() as directory:
+            file_engine = database_example.create_sqlite_engine(os.path.join(directory, "users.db"))
+            Base.metadata.create_all(bind=file_engine)
+            database_example.bulk_insert_users(database_example._generated_users(20),
+                                               bind=file_engine)
+            registry = scoped_session(sessionmaker(bind=file_engine))
+            registry().delete(registry().get(User, 7))
+            registry().commit()
+            registry.remove()
+            for user_ids in (None, list(range(1, 21))):
+                with self.subTest(user_ids=user_ids):
+                    ops_per_second, _, _, errors = database_example.run_user_load(
+                        registry, threads=3, duration=0.2, read_ratio=0.0, user_ids=user_ids)
+                    self.assertGreater(ops_per_second, 0)
+                    self.assertEqual(errors, 0)
+            file_engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,518 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+import re
+import csv
+import asyncio
+import shutil
+import tempfile
+import time
+import threading
+from unittest import mock
+
+# Add the parent directory (project root) to the Python path so that
+# 'file_operations.py' can be imported when running tests from 'tests/'.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import file_operations
+
+
+class TestFileOperations(unittest.TestCase):
+    """
+    Test cases for the reusable helpers in file_operations.py.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_file(self, name, content):
+        """Helper that writes a text file into the temporary directory."""
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        return path
+
+    def join_batches(self, batches, width):
+        """Helper that concatenates the columns of a sequence of batches."""
+        columns = [[] for _ in range(width)]
+        for batch in batches:
+            for column, values in zip(columns, batch):
+                column.extend(values)
+        return columns
+
+    # --- Tests for BufferedAppender and atomic_write ---
+    def test_appender_buffers_until_size_threshold(self):
+        """Test that writes stay in memory until flush_bytes is reached, then flush as one batch."""
+        path = os.path.join(self.tmp_dir, "log.txt")
+        with file_operations.BufferedAppender(path, flush_bytes=10, flush_interval=60) as appender:
+            appender.write("abc\n")
+            self.assertEqual(os.path.getsize(path), 0)
+            appender.write("défg\n")
+            self.assertEqual(os.path.getsize(path), 10)
+            appender.write("tail")
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "abc\ndéfg\ntail")
+
+    def test_appender_fsync_policies(self):
+        """Test how many times each durability policy calls os.fsync."""
+        path = os.path.join(self.tmp_dir, "log.txt")
+        for policy, expected in [("none", 0), ("always", 3), ("interval", 1)]:
+            with mock.patch.object(file_operations.os, "fsync") as fsync:
+                with file_operations.BufferedAppender(path, flush_bytes=1, fsync=policy,
+                                                      fsync_interval=60) as appender:
+                    for _ in range(3):
+                        appender.write("x")
+            with self.subTest(policy=policy):
+                self.assertEqual(fsync.call_count, expected)
+        with self.assertRaises(ValueError):
+            file_operations.BufferedAppender(path, fsync="sometimes")
+
+    def test_appender_flushes_and_fsyncs_on_timer_without_another_write(self):
+        """Test that the background thread flushes a burst's tail, then fsyncs it on its timer."""
+        path = os.path.join(self.tmp_dir, "log.txt")
+        with mock.patch.object(file_operations.os, "fsync") as fsync:
+            with file_operations.BufferedAppender(path, flush_interval=0.05, fsync="interval",
+                                                  fsync_interval=0.05) as appender:
+                appender.write("last event\n")
+                self.assertEqual(os.path.getsize(path), 0)
+                deadline = time.monotonic() + 5
+                while fsync.call_count == 0 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(os.path.getsize(path), len("last event\n"))
+                self.assertEqual(fsync.call_count, 1)
+
+    def test_appender_writes_continue_during_a_slow_background_fsync(self):
+        """Test that interval fsyncs run on the background thread and don't hold up write()."""
+        path = os.path.join(self.tmp_dir, "log.txt")
+        fsync_started, release_fsync = threading.Event(), threading.Event()
+        fsync_threads = []
+
+        def slow_fsync(_fd):
+            fsync_threads.append(threading.current_thread())
+            fsync_started.set()
+            release_fsync.wait(5)
+
+        with mock.patch.object(file_operations.os, "fsync", side_effect=slow_fsync):
+            appender = file_operations.BufferedAppender(path, flush_bytes=1, fsync="interval",
+                                                        fsync_interval=0)
+            appender.write("first\n")
+            self.assertTrue(fsync_started.wait(5))
+            writer = threading.Thread(target=appender.write, args=("second\n",))
+            writer.start()
+            writer.join(2)
+            self.assertFalse(writer.is_alive())
+            self.assertEqual(os.path.getsize(path), len("first\nsecond\n"))
+            release_fsync.set()
+            appender.close()
+        self.assertNotIn(threading.main_thread(), fsync_threads[:1])
+        with self.assertRaisesRegex(ValueError, "closed"):
+            appender.write("late\n")
+
+    def test_atomic_write_new_file_mode_without_changing_umask(self):
+        """Test that a new file gets open()'s default mode without os.umask() being called."""
+        path = os.path.join(self.tmp_dir, "new.txt")
+        with mock.patch.object(file_operations.os, "umask",
+                               side_effect=AssertionError("umask changed")):
+            with file_operations.atomic_write(path, fsync=False) as f:
+                f.write("x")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~file_operations._PROCESS_UMASK)
+
+    def test_atomic_write_replaces_whole_file_or_nothing(self):
+        """Test that a failed rewrite keeps the old content and leaves no temporary file."""
+        path = self.write_file("data.txt", "old\n")
+        os.chmod(path, 0o640)
+        with self.assertRaises(RuntimeError):
+            with file_operations.atomic_write(path) as f:
+                f.write("half")
+                raise RuntimeError("crash")
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "old\n")
+        self.assertEqual(os.listdir(self.tmp_dir), ["data.txt"])
+
+        with file_operations.atomic_write(path) as f:
+            f.write("new\n")
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "new\n")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+    # --- Tests for LineIndex ---
+    def test_line_index_random_access(self):
+        """Test single lines, negative indexes, slices and a last line without newline."""
+        path = self.write_file("log.txt", "zero\none\ntwo\nthree")
+        with file_operations.LineIndex(path) as index:
+            self.assertEqual(len(index), 4)
+            self.assertEqual(index[1], "one\n")
+            self.assertEqual(index[-1], "three")
+            self.assertEqual(index[1:3], ["one\n", "two\n"])
+            self.assertEqual(index[::2], ["zero\n", "two\n"])
+            with self.assertRaises(IndexError):
+                index[4]
+
+    def test_line_index_slices_split_on_newlines_only(self):
+        """Test that slices agree with len() and indexing when lines hold other line separators."""
+        path = self.write_file("separators.txt",
+                               "form\x0cfeed\nlone\rreturn\nline\u2028sep\nend\x85")
+        with file_operations.LineIndex(path) as index:
+            self.assertEqual(len(index), 4)
+            self.assertEqual(index[0:4], [index[i] for i in range(4)])
+            self.assertEqual(index[1:3], ["lone\rreturn\n", "line\u2028sep\n"])
+
+    def test_line_index_extends_saved_index_on_append(self):
+        """Test that appends are indexed incrementally and the index is reused on reopen."""
+        path = self.write_file("log.txt", "a\nb")
+        with file_operations.LineIndex(path) as index:
+            self.assertEqual(index.append("c\nd\n"), 3)
+            self.assertEqual(index[:], ["a\n", "bc\n", "d\n"])
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("e\n")
+        with file_operations.LineIndex(path) as index:
+            self.assertEqual(index._size, os.path.getsize(path))
+            self.assertEqual(index[-1], "e\n")
+        # Five offsets (four line starts plus the end of file) after the 28-byte header.
+        self.assertEqual(os.path.getsize(path + file_operations.LINE_INDEX_SUFFIX), 28 + 5 * 8)
+
+    def test_line_index_rebuilds_after_rewrite(self):
+        """Test that a file rewritten with 'w' is indexed from scratch."""
+        path = self.write_file("log.txt", "first\nsecond\n")
+        file_operations.LineIndex(path).close()
+        self.write_file("log.txt", "FIRST LINE\nx\ny\n")
+        with file_operations.LineIndex(path) as index:
+            self.assertEqual(index[:], ["FIRST LINE\n", "x\n", "y\n"])
+        self.write_file("log.txt", "")
+        with file_operations.LineIndex(path) as index:
+            self.assertEqual(len(index), 0)
+            self.assertEqual(index[:], [])
+
+    # --- Tests for compressed files ---
+    def test_open_file_round_trips_each_codec_by_extension_and_magic(self):
+        """Test writing by extension, then reading both by extension and by magic bytes."""
+        for extension, codec in [(".gz", "gzip"), (".bz2", "bz2"), (".xz", "xz")]:
+            if codec not in file_operations.COMPRESSION_CODECS:
+                continue  # Python built without lzma.
+            with self.subTest(codec=codec):
+                path = os.path.join(self.tmp_dir, "people.csv" + extension)
+                with file_operations.open_file(path, 'w', newline='') as f:
+                    f.write("Name,Age\nAlice,30\n")
+                with file_operations.open_file(path, 'a', newline='') as f:
+                    f.write("Bob,24\n")
+                with open(path, 'rb') as f:
+                    magic = file_operations.COMPRESSION_CODECS[codec][1]
+                    self.assertTrue(re.match(magic, f.read()))
+                plain_name = os.path.join(self.tmp_dir, codec + ".csv")
+                os.replace(path, plain_name)
+                self.assertEqual(file_operations.detect_compression(plain_name), codec)
+                self.assertEqual([tuple(r) for r in file_operations.iter_csv_records(plain_name)],
+                                 [("Alice", "30"), ("Bob", "24")])
+        self.assertIsNone(file_operations.detect_compression(self.write_file("plain.txt", "text")))
+
+    def test_plain_files_starting_with_bz2_letters_are_not_compressed(self):
+        """Test that text beginning with "BZh" is not mistaken for a bz2 stream."""
+        for name, content in [("codes.csv", "BZh,count\nx,1\n"), ("app.log", "BZh9 started\n")]:
+            with self.subTest(name=name):
+                path = self.write_file(name, content)
+                self.assertIsNone(file_operations.detect_compression(path))
+                with file_operations.open_file(path) as f:
+                    self.assertEqual(f.read(), content)
+
+    def test_compressed_json_helpers_and_atomic_write(self):
+        """Test that JSON helpers and atomic_write compress files named .gz."""
+        path = os.path.join(self.tmp_dir, "doc.json.gz")
+        with file_operations.atomic_write(path) as f:
+            json.dump({"courses": [{"title": "Math"}]}, f)
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(json.load(f)["courses"][0]["title"], "Math")
+        parser = file_operations.IncrementalJsonParser(path)
+        self.assertEqual(list(parser.items("courses.item.title")), ["Math"])
+        with self.assertRaises(ValueError):
+            file_operations.LineIndex(path)
+
+        lines_path = os.path.join(self.tmp_dir, "events.jsonl.bz2")
+        with file_operations.JsonLinesWriter(lines_path) as writer:
+            writer.write_many([{"n": 1}, {"n": 2}])
+        self.assertEqual(list(file_operations.iter_json_lines(lines_path)), [{"n": 1}, {"n": 2}])
+
+    # --- Tests for iter_csv_records ---
+    def test_csv_records_are_named_tuples_with_projection(self):
+        """Test full rows, projected columns, and renaming of non-identifier headers."""
+        path = self.write_file("people.csv", "Name,Age,Home City\nAlice,30,Paris\nBob,24,Rome\n")
+        records = list(file_operations.iter_csv_records(path))
+        self.assertEqual(records[0], ("Alice", "30", "Paris"))
+        self.assertEqual((records[1].Name, records[1].Age, records[1]._2), ("Bob", "24", "Rome"))
+        projected = file_operations.iter_csv_records(path, ["Home City", "Name"])
+        self.assertEqual([tuple(r) for r in projected], [("Paris", "Alice"), ("Rome", "Bob")])
+        self.assertEqual([r.Age for r in file_operations.iter_csv_records(path, ["Age"])],
+                         ["30", "24"])
+
+    def test_csv_records_reject_mismatched_rows(self):
+        """Test that unknown columns and short rows raise ValueError."""
+        path = self.write_file("people.csv", "Name,Age\nAlice,30\nBob\n")
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            list(file_operations.iter_csv_records(path))
+        with self.assertRaises(ValueError):
+            list(file_operations.iter_csv_records(path, ["Email"]))
+
+    def test_csv_records_decode_with_the_given_encoding(self):
+        """Test that rows are decoded as UTF-8 by default, or with the encoding passed in."""
+        path = os.path.join(self.tmp_dir, "cities.csv")
+        with open(path, 'w', encoding='cp1252', newline='') as f:
+            f.write("city\nZürich\n")
+        with self.assertRaises(UnicodeDecodeError):
+            list(file_operations.iter_csv_records(path))
+        records = file_operations.iter_csv_records(path, encoding="cp1252")
+        self.assertEqual([row.city for row in records], ["Zürich"])
+
+    def test_csv_records_skip_blank_lines_like_dictreader(self):
+        """Test that blank lines are skipped, with or without projection, as in csv.DictReader."""
+        path = self.write_file("numbers.csv", "a,b\n1,2\n\n3,4\n\n")
+        self.assertEqual([tuple(row) for row in file_operations.iter_csv_records(path)],
+                         [("1", "2"), ("3", "4")])
+        self.assertEqual([row.b for row in file_operations.iter_csv_records(path, ["b"])],
+                         ["2", "4"])
+        with open(path, encoding='utf-8', newline='') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 2)
+
+    # --- Tests for iter_csv_batches_parallel ---
+    def test_csv_byte_ranges_never_split_quoted_fields(self):
+        """Test that ranges end only on newlines outside quotes, and cover the whole input."""
+        data = b'a,"x\ny",1\nb,"say ""hi""\n",2\nc,z,3\n'
+        ranges = list(file_operations._csv_byte_ranges(data, 0, 1, b'"'))
+        self.assertEqual([data[start:end] for start, end in ranges],
+                         [b'a,"x\ny",1\n', b'b,"say ""hi""\n",2\n', b'c,z,3\n'])
+
+    def test_parallel_csv_batches_match_serial_reader(self):
+        """Test that parallel parsing of quoted multi-line fields matches iter_csv_batches."""
+        lines = ["id,note,score"] + [f'{i},"note {i}\nsecond ""line""",{i / 4}' for i in range(200)]
+        path = self.write_file("notes.csv", "\r\n".join(lines) + "\r\n")
+        schema = [("note", str), ("id", int), ("score", float)]
+        expected = self.join_batches(file_operations.iter_csv_batches(path, schema), 3)
+        batches = list(file_operations.iter_csv_batches_parallel(path, schema, jobs=2,
+                                                                 chunk_bytes=256))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(self.join_batches(batches, 3), expected)
+        with self.assertRaises(ValueError):
+            list(file_operations.iter_csv_batches_parallel(path, schema, escapechar="\\"))
+
+    def test_parallel_csv_batches_resync_after_a_bare_quote(self):
+        """Test that a quote inside an unquoted field does not throw off parallel splitting."""
+        content = 'name,height,note\nal,5"10,ok\nbo,6,"two\nlines"\ncy,5,fine\n'
+        path = self.write_file('bare_quote.csv', content)
+        schema = [("name", str), ("height", str), ("note", str)]
+        serial = self.join_batches(file_operations.iter_csv_batches(path, schema), len(schema))
+        for header in ('name,height,note\n', 'na"me,height,note\n'):
+            with self.subTest(header=header):
+                path = self.write_file('bare_quote.csv', header + content.split('\n', 1)[1])
+                fields = [(header.split(',', maxsplit=1)[0], str)] + schema[1:]
+                batches = file_operations.iter_csv_batches_parallel(path, fields, jobs=2,
+                                                                    chunk_bytes=1)
+                self.assertEqual(self.join_batches(batches, len(fields)), serial)
+
+    # --- Tests for read_csv_columns ---
+    @unittest.skipIf(file_operations.np is None, "NumPy is not installed")
+    def test_csv_column_cache_is_reused_until_csv_changes(self):
+        """Test that cached columns skip parsing, and a changed CSV or schema rebuilds them."""
+        path = self.write_file("people.csv", "Name,Age\nAlice,30\nBob,24\n")
+        schema = [("Name", str), ("Age", int)]
+        first = file_operations.read_csv_columns(path, schema)
+        self.assertEqual(first["Age"].tolist(), [30, 24])
+        self.assertTrue(os.path.exists(os.path.join(path + ".columns", "manifest.json")))
+
+        with mock.patch.object(file_operations, "iter_csv_batches",
+                               side_effect=AssertionError("parsed")):
+            cached = file_operations.read_csv_columns(path, schema)
+        self.assertIsInstance(cached["Age"], file_operations.np.memmap)
+        self.assertEqual(cached["Name"].tolist(), ["Alice", "Bob"])
+
+        self.write_file("people.csv", "Name,Age\nAlice,31\nBob,24\nCarol,28\n")
+        self.assertEqual(file_operations.read_csv_columns(path, schema)["Age"].tolist(),
+                         [31, 24, 28])
+        floats = file_operations.read_csv_columns(path, [("Age", float)])
+        self.assertEqual(floats["Age"].dtype.kind, 'f')
+
+    @unittest.skipIf(file_operations.np is None, "NumPy is not installed")
+    def test_csv_column_cache_is_keyed_on_parse_options(self):
+        """Test that changing has_header or delimiter rebuilds the cache; batch_size reuses it."""
+        path = self.write_file("letters.csv", "a\n1\n3\n")
+        schema = [("a", str)]
+        without_header = file_operations.read_csv_columns(path, schema, has_header=False)
+        self.assertEqual(without_header["a"].tolist(), ["a", "1", "3"])
+        self.assertEqual(file_operations.read_csv_columns(path, schema)["a"].tolist(), ["1", "3"])
+        self.assertEqual(
+            file_operations.read_csv_columns(path, schema, delimiter=";")["a"].tolist(), ["1", "3"])
+        with mock.patch.object(file_operations, "iter_csv_batches",
+                               side_effect=AssertionError("parsed")):
+            cached = file_operations.read_csv_columns(path, schema, delimiter=";", batch_size=1)
+        self.assertEqual(cached["a"].tolist(), ["1", "3"])
+
+        with open(path, 'w', encoding='cp1252', newline='') as f:
+            f.write("a\nZürich\n")
+        self.assertEqual(
+            file_operations.read_csv_columns(path, schema, encoding="cp1252")["a"].tolist(),
+            ["Zürich"])
+        with self.assertRaises(UnicodeDecodeError):
+            file_operations.read_csv_columns(path, schema)
+
+    # --- Tests for IncrementalJsonParser ---
+    def test_json_parser_matches_json_load_across_chunk_boundaries(self):
+        """Test events and items() with chunks small enough to split every token."""
+        document = {"name": "Zoë \"Q\" \\ ok", "n": -12, "x": 1.5e-3, "flags": [True, False, None],
+                    "courses": [{"title": "History", "credits": 3, "tags": []},
+                                {"title": "Math", "credits": 4.0}],
+                    "empty": {}}
+        path = os.path.join(self.tmp_dir, "doc.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        for chunk_size in (1, 3, 65536):
+            parser = file_operations.IncrementalJsonParser(path, chunk_size=chunk_size)
+            self.assertEqual(list(parser.items("")), [document])
+            self.assertEqual(list(parser.items("courses.item")), document["courses"])
+            self.assertEqual(list(parser.items("courses.item.title")), ["History", "Math"])
+            self.assertEqual(list(parser.items("flags.item")), [True, False, None])
+        events = list(file_operations.IncrementalJsonParser(path).events())
+        self.assertEqual(events[:3], [("", "start_map", None), ("", "map_key", "name"),
+                                      ("name", "value", document["name"])])
+        self.assertIn(("courses.item", "start_map", None), events)
+        self.assertIn(("courses.item.credits", "value", 4.0), events)
+        self.assertEqual(events[-1], ("", "end_map", None))
+
+    def test_json_parser_rejects_malformed_documents(self):
+        """Test that structural and lexical errors raise ValueError."""
+        for text in ['', '{"a": 1', '[1, ]', '{"a" 1}', '[1 2]', 'tru', '[1]]', '[01]',
+                     '{"a": [{"b": 1,}]}']:
+            path = self.write_file("bad.json", text)
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(file_operations.IncrementalJsonParser(path, chunk_size=2).events())
+                with self.assertRaises(ValueError):
+                    list(file_operations.IncrementalJsonParser(path, chunk_size=2).items("a.item"))
+
+    # --- Tests for the async variants ---
+    def test_async_json_and_text_round_trip(self):
+        """Test write_json_async followed by read_text_async."""
+        path = os.path.join(self.tmp_dir, "data.json")
+
+        async def run():
+            await file_operations.write_json_async(path, {"a": [1, 2]}, indent=None)
+            return await asyncio.gather(*(file_operations.read_text_async(path) for _ in range(20)))
+
+        self.assertEqual(asyncio.run(run()), ['{"a": [1, 2]}'] * 20)
+
+    def test_async_csv_batches_match_sync_reader(self):
+        """Test that iter_csv_batches_async yields the same batches as iter_csv_batches."""
+        path = self.write_file("people.csv",
+                               "Name,Age\n" + "".join(f"p{i},{i}\n" for i in range(10)))
+        schema = [("Name", str), ("Age", int)]
+
+        async def run():
+            batches = file_operations.iter_csv_batches_async(path, schema, batch_size=4)
+            return [batch async for batch in batches]
+
+        self.assertEqual(asyncio.run(run()),
+                         list(file_operations.iter_csv_batches(path, schema, batch_size=4)))
+
+    def test_async_csv_batches_cancelled_mid_batch(self):
+        """Test that cancelling while the pool parses a batch cancels and closes the reader."""
+        closed = []
+
+        def slow_batches(*_args, **_kwargs):
+            try:
+                while True:
+                    time.sleep(0.2)
+                    yield (["p"], [1])
+            finally:
+                closed.append(True)
+
+        async def consume():
+            async for _ in file_operations.iter_csv_batches_async("people.csv", [("Name", str)]):
+                pass
+
+        with mock.patch.object(file_operations, "iter_csv_batches", slow_batches):
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(asyncio.wait_for(consume(), 0.05))
+        self.assertEqual(closed, [True])
+
+    # --- Tests for JSON Lines ---
+    def test_json_lines_round_trip_with_buffered_appends(self):
+        """Test that buffered records reach the file on flush and appends keep old records."""
+        path = os.path.join(self.tmp_dir, "events.jsonl")
+        with file_operations.JsonLinesWriter(path, flush_every=2) as writer:
+            writer.write({"n": 1})
+            self.assertEqual(os.path.getsize(path), 0)
+            writer.write({"n": 2, "name": "Zoë"})
+            self.assertGreater(os.path.getsize(path), 0)
+            writer.write([3])
+        with file_operations.JsonLinesWriter(path) as writer:
+            writer.write_many([None, "text"])
+        self.assertEqual(list(file_operations.iter_json_lines(path)),
+                         [{"n": 1}, {"n": 2, "name": "Zoë"}, [3], None, "text"])
+
+    def test_json_lines_reader_reports_or_skips_bad_lines(self):
+        """Test line numbers in decode errors and skip_invalid for a torn last line."""
+        path = self.write_file("events.jsonl", '{"n": 1}\n\n{"n": 2}\n{"n": ')
+        with self.assertRaisesRegex(ValueError, "line 4"):
+            list(file_operations.iter_json_lines(path))
+        self.assertEqual(list(file_operations.iter_json_lines(path, skip_invalid=True)),
+                         [{"n": 1}, {"n": 2}])
+
+    # --- Tests for iter_csv_batches ---
+    def test_csv_batches_convert_columns_by_header_name(self):
+        """Test that schema columns are picked by name, typed and split into batches."""
+        path = self.write_file("people.csv",
+                               "Name,Age,Score\nAlice,30,1.5\nBob,24,2\nCarol,28,3.25\n")
+        schema = [("Score", float), ("Name", str), ("Age", int)]
+        batches = list(file_operations.iter_csv_batches(path, schema, batch_size=2))
+        self.assertEqual(batches, [
+            ([1.5, 2.0], ["Alice", "Bob"], [30, 24]),
+            ([3.25], ["Carol"], [28]),
+        ])
+
+    def test_csv_batches_single_column_without_header(self):
+        """Test positional schemas and single-column projection."""
+        path = self.write_file("numbers.csv", "1\n2\n3\n")
+        batches = list(file_operations.iter_csv_batches(path, [("n", int)], has_header=False))
+        self.assertEqual(batches, [([1, 2, 3],)])
+
+    def test_csv_batches_decode_with_the_given_encoding(self):
+        """Test that serial and parallel readers decode with the same encoding, UTF-8 by default."""
+        path = os.path.join(self.tmp_dir, "cities.csv")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write("city,n\nZürich,1\n")
+        schema = [("city", str)]
+        self.assertEqual(list(file_operations.iter_csv_batches(path, schema)), [(["Zürich"],)])
+        self.assertEqual(list(file_operations.iter_csv_batches_parallel(path, schema)),
+                         [(["Zürich"],)])
+        self.assertEqual(list(file_operations.iter_csv_batches(path, schema, encoding="latin-1")),
+                         [(["ZÃ¼rich"],)])
+
+    def test_csv_batches_empty_file_yields_nothing(self):
+        """Test that an empty file yields no batches from either reader, with or without header."""
+        path = self.write_file("empty.csv", "")
+        schema = [("Age", int)]
+        self.assertEqual(list(file_operations.iter_csv_batches(path, schema)), [])
+        self.assertEqual(list(file_operations.iter_csv_batches(path, schema, has_header=False)), [])
+        self.assertEqual(list(file_operations.iter_csv_batches_parallel(path, schema)), [])
+
+    def test_csv_batches_report_bad_values_by_column(self):
+        """Test that a conversion error names the offending column."""
+        path = self.write_file("bad.csv", "Age\nthirty\n")
+        with self.assertRaisesRegex(ValueError, "'Age'"):
+            list(file_operations.iter_csv_batches(path, [("Age", int)]))
+
+    @unittest.skipIf(file_operations.np is None, "NumPy is not installed")
+    def test_csv_batches_as_numpy_arrays(self):
+        """Test that as_numpy yields typed NumPy arrays."""
+        path = self.write_file("people.csv", "Name,Age\nAlice,30\nBob,24\n")
+        (names, ages), = file_operations.iter_csv_batches(path, [("Name", str), ("Age", int)],
+                                                          as_numpy=True)
+        self.assertEqual(ages.dtype.kind, 'i')
+        self.assertEqual(ages.sum(), 54)
+        self.assertEqual(names.tolist(), ["Alice", "Bob"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,341 @@
+import unittest
+import sys
+import os
+import gzip
+import io
+import contextlib
+import json
+import shutil
+import tempfile
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from pygments import highlight
+
+# Add the parent directory (project root) to the Python path
+# This allows us to import modules from the root directory (e.g., 'generate_html_index.py')
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import generate_html_index
+from generate_html_index import FragmentCache, generate_html_for_files
+
+
+class TestGenerateHtmlIndex(unittest.TestCase):
+    """
+    Test cases for the HTML index generator in generate_html_index.py.
+    Each test works inside its own temporary directory.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_script(self, name, content):
+        """Helper that writes a small Python script into the temporary directory."""
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    # --- Tests for the rendering engine ---
+    def test_token_stream_is_lexed_once_for_all_formats(self):
+        """Test that HTML, ANSI and plain text are all rendered from one token stream."""
+        path = self.write_script("demo.py", "def greet(name):\n    return f'Hello {name}'\n")
+        with mock.patch.object(generate_html_index, "lex_source",
+                               wraps=generate_html_index.lex_source) as lex:
+            outputs = generate_html_index.render_file(path, ("html", "ansi", "text"))
+        self.assertEqual(lex.call_count, 1)
+        self.assertTrue(outputs["html"].startswith('<div class="highlight">'))
+        self.assertIn("\x1b[", outputs["ansi"])
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(outputs["text"], f.read())
+
+    def test_html_rendering_matches_pygments_highlight(self):
+        """Test that rendering from the token stream gives the same HTML as pygments.highlight()."""
+        code = "import os\nprint(os.getcwd())  # comment\n"
+        expected = highlight(code, generate_html_index.get_lexer(),
+                             generate_html_index.get_formatter("html"))
+        tokens = generate_html_index.lex_source(code)
+        self.assertEqual(generate_html_index.render_tokens(tokens), expected)
+
+    def test_unknown_output_format(self):
+        """Test that an unknown output format raises a ValueError."""
+        with self.assertRaises(ValueError):
+            generate_html_index.get_formatter("pdf")
+
+    # --- Tests for FragmentCache ---
+    def test_cached_output_matches_uncached_output(self):
+        """Test that reusing cached fragments produces exactly the same HTML."""
+        paths = [self.write_script("a.py", "x = 1\n"),
+                 self.write_script("b.py", "def f():\n    return 2\n")]
+        expected = generate_html_for_files(paths, "Scripts")
+        cache = FragmentCache(self.cache_dir)
+        first = generate_html_for_files(paths, "Scripts", cache)
+        second = generate_html_for_files(paths, "Scripts", cache)
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 2)
+
+    def test_only_changed_files_are_highlighted_again(self):
+        """Test that editing one file only causes a cache miss for that file."""
+        paths = [self.write_script("a.py", "x = 1\n"), self.write_script("b.py", "y = 2\n")]
+        generate_html_for_files(paths, "Scripts", FragmentCache(self.cache_dir))
+        self.write_script("b.py", "y = 3\n")
+        cache = FragmentCache(self.cache_dir)
+        html = generate_html_for_files(paths, "Scripts", cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIn("3", html)
+
+    def test_cache_key_depends_on_style(self):
+        """Test that the Pygments style is part of the cache key."""
+        code = "print('hi')\n"
+        self.assertNotEqual(FragmentCache(self.cache_dir, style="default").key_for(code),
+                            FragmentCache(self.cache_dir, style="friendly").key_for(code))
+
+    # --- Tests for parallel highlighting ---
+    def test_parallel_output_matches_serial_output(self):
+        """Test that highlighting in worker processes keeps the sorted file order."""
+        paths = [self.write_script(f"s{i}.py", f"value_{i} = {i}\n") for i in range(40)]
+        expected = generate_html_for_files(paths, "Scripts")
+        cache = FragmentCache(self.cache_dir)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            html = generate_html_for_files(list(reversed(paths)), "Scripts", cache, executor)
+        self.assertEqual(html, expected)
+        # Hits and misses counted in the workers are reported back to the parent's cache.
+        self.assertEqual((cache.hits, cache.misses), (0, 40))
+
+    # --- Tests for the streaming writer ---
+    def test_streamed_page_matches_in_memory_page(self):
+        """Test that streaming the page to disk writes exactly the same bytes."""
+        paths = [self.write_script("a.py", "x = 1\n"), self.write_script("b.py", "y = 2\n")]
+        categories = [("Scripts", paths), ("Empty", []), ("More", paths[:1])]
+        css = generate_html_index.get_pygments_css()
+        in_memory = os.path.join(self.tmp_dir, "in_memory.html")
+        streamed = os.path.join(self.tmp_dir, "streamed.html")
+        generate_html_index.write_index(in_memory,
+                                        generate_html_index.iter_index_page(categories, css))
+        generate_html_index.write_index(streamed,
+                                        generate_html_index.iter_index_page(categories, css),
+                                        stream=True)
+        with open(in_memory, 'r', encoding='utf-8') as f1, \
+                open(streamed, 'r', encoding='utf-8') as f2:
+            self.assertEqual(f1.read(), f2.read())
+        self.assertFalse(os.path.exists(streamed + ".tmp"))
+
+    # --- Tests for sharded output ---
+    def test_sharded_page_references_fragment_files(self):
+        """Test that sharded mode writes one fragment per script and keeps code out of the page."""
+        paths = [self.write_script("a.py", "alpha_value = 1\n"),
+                 self.write_script("b.py", "beta_value = 2\n")]
+        shard = generate_html_index.ShardWriter(os.path.join(self.tmp_dir, "fragments"))
+        page = generate_html_for_files(paths, "Scripts", shard=shard)
+        self.assertNotIn("alpha_value", page)
+        self.assertEqual(page.count("data-fragment="), 2)
+        for path in paths:
+            name = shard.fragment_name(path)
+            self.assertIn(f'data-fragment="fragments/{name}"', page)
+            with open(os.path.join(shard.fragments_dir, name), 'r', encoding='utf-8') as f:
+                self.assertIn('class="highlight"', f.read())
+
+    def test_sharded_mode_removes_stale_fragments(self):
+        """Test that fragments of deleted scripts are removed."""
+        shard = generate_html_index.ShardWriter(os.path.join(self.tmp_dir, "fragments"))
+        generate_html_for_files([self.write_script("old.py", "x = 1\n")], "Scripts", shard=shard)
+        shard = generate_html_index.ShardWriter(shard.fragments_dir)
+        generate_html_for_files([self.write_script("new.py", "y = 2\n")], "Scripts", shard=shard)
+        shard.remove_stale()
+        self.assertEqual(os.listdir(shard.fragments_dir),
+                         [shard.fragment_name(os.path.join(self.tmp_dir, "new.py"))])
+
+    # --- Tests for the external stylesheet and precompressed output ---
+    def test_stylesheet_name_depends_on_content(self):
+        """Test that the stylesheet is named after its content and old versions are removed."""
+        first = generate_html_index.write_stylesheet(".a { color: red; }", self.tmp_dir)
+        second = generate_html_index.write_stylesheet(".a { color: blue; }", self.tmp_dir)
+        self.assertNotEqual(first, second)
+        self.assertTrue(second.startswith("pygments-") and second.endswith(".css"))
+        self.assertEqual(generate_html_index.write_stylesheet(".a { color: blue; }", self.tmp_dir),
+                         second)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, first)))
+        self.assertIn(f'href="{second}"', generate_html_index.stylesheet_link(second))
+
+    def test_stylesheet_cleanup_keeps_files_it_did_not_write(self):
+        """Test that a pygments-*.css file without the generator's marker is never removed."""
+        hand_written = self.write_script("pygments-theme.css", ".a { color: green; }\n")
+        generate_html_index.write_stylesheet(".a { color: red; }", self.tmp_dir)
+        self.assertTrue(os.path.exists(hand_written))
+
+    def test_precompressed_copies_round_trip(self):
+        """Test that .gz (and .xz, if available) copies decompress to the original bytes."""
+        path = self.write_script("page.html", "<p>hello</p>\n" * 100)
+        written = generate_html_index.precompress_file(path)
+        self.assertIn(path + ".gz", written)
+        with open(path, 'rb') as f:
+            original = f.read()
+        with gzip.open(path + ".gz", 'rb') as f:
+            self.assertEqual(f.read(), original)
+        if generate_html_index.lzma is not None:
+            with generate_html_index.lzma.open(path + ".xz", 'rb') as f:
+                self.assertEqual(f.read(), original)
+        # Up-to-date copies are not written again.
+        self.assertEqual(generate_html_index.precompress_file(path), [])
+
+    # --- Tests for the search index ---
+    def test_extract_search_terms(self):
+        """Test that names, identifier parts and docstring words are indexed."""
+        code = (
+            'class TemperatureConverter:\n'
+            '    """Converts between Fahrenheit and Celsius."""\n'
+            '    def fahr_to_celsius(self, fahr):\n'
+            '        return (5 * (fahr - 32)) / 9\n'
+        )
+        result = generate_html_index.extract_search_terms(code)
+        self.assertEqual(result["defs"], ["TemperatureConverter", "fahr_to_celsius"])
+        for term in ["temperatureconverter", "fahr_to_celsius", "celsius", "fahr", "fahrenheit",
+                     "converts"]:
+            self.assertIn(term, result["terms"])
+
+    def test_extract_search_terms_from_invalid_python(self):
+        """Test that scripts which cannot be parsed are still indexed by their words."""
+        result = generate_html_index.extract_search_terms("print 'hello world'\n")
+        self.assertEqual(result["defs"], [])
+        self.assertIn("hello", result["terms"])
+
+    def test_search_index_is_built_in_the_highlighting_pass(self):
+        """Test that serial and parallel builds produce the same inverted index."""
+        a = self.write_script("a.py", "def alpha():\n    return shared_name\n")
+        b = self.write_script("b.py", "def beta():\n    return shared_name\n")
+        serial = generate_html_index.SearchIndex()
+        list(generate_html_index.iter_highlighted_files([a, b], search_index=serial))
+        parallel = generate_html_index.SearchIndex()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            list(generate_html_index.iter_highlighted_files([a, b], FragmentCache(self.cache_dir),
+                                                            executor, parallel))
+        index = serial.to_dict()
+        self.assertEqual(parallel.to_dict(), index)
+        self.assertEqual(index["terms"], sorted(index["terms"]))
+        self.assertEqual(index["postings"][index["terms"].index("shared_name")], [0, 1])
+        self.assertEqual(index["postings"][index["terms"].index("alpha")], [0])
+        self.assertEqual(index["files"][1]["defs"], ["beta"])
+
+        # The index round-trips through JSON.
+        path = os.path.join(self.tmp_dir, "search-index.json")
+        serial.write(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), index)
+
+    # --- Tests for the build profiler ---
+    def test_profiler_records_every_stage_and_size(self):
+        """Test that a profiled build reports per-file timings, sizes and a sorted top list."""
+        paths = [self.write_script("small.py", "x = 1\n"),
+                 self.write_script("large.py", "".join(f"value_{i} = {i}\n" for i in range(500)))]
+        profiler = generate_html_index.BuildProfiler()
+        output_path = os.path.join(self.tmp_dir, "index.html")
+        generate_html_index.write_index(output_path, generate_html_index.iter_index_page(
+            [("Scripts", paths)], "", profiler=profiler))
+        report = profiler.report([output_path])
+
+        self.assertEqual(report["files_indexed"], 2)
+        self.assertEqual([row["path"] for row in report["files"]], [paths[1], paths[0]])
+        for row in report["files"]:
+            self.assertGreater(row["bytes"], 0)
+            self.assertGreaterEqual(row["total"], row["lex"] + row["format"])
+        self.assertEqual(report["total_output_bytes"], os.path.getsize(output_path))
+        self.assertIn("large.py", generate_html_index.BuildProfiler.summary(report, top_n=1))
+        self.assertNotIn("small.py", generate_html_index.BuildProfiler.summary(report, top_n=1))
+
+    # --- Tests for file discovery ---
+    def test_ignore_rules_follow_gitignore_syntax(self):
+        """Test anchoring, directory-only patterns, ** and negation."""
+        rules = generate_html_index.IgnoreRules(["*.pyc", "!keep.pyc", "/build/",
+                                                 "docs/**/gen_*.py"])
+        self.assertTrue(rules.is_ignored("pkg/mod.pyc", False))
+        self.assertFalse(rules.is_ignored("keep.pyc", False))
+        self.assertTrue(rules.is_ignored("build", True))
+        self.assertFalse(rules.is_ignored("src/build", True))
+        self.assertFalse(rules.is_ignored("build", False))
+        self.assertTrue(rules.is_ignored("docs/a/b/gen_x.py", False))
+        self.assertFalse(rules.is_ignored("docs/a/b/x.py", False))
+
+    def test_discovery_is_recursive_and_honours_gitignore(self):
+        """Test that nested scripts are found and ignored directories are skipped."""
+        for directory in ["tests", "pkg/sub", ".git", "skipped", "__pycache__"]:
+            os.makedirs(os.path.join(self.tmp_dir, directory))
+        for name in ["a.py", "generate_html_index.py", "notes.txt", "tests/test_a.py",
+                     "pkg/sub/deep.py", ".git/hook.py", "skipped/s.py", "__pycache__/c.py",
+                     "pkg/sub/scratch_1.py"]:
+            self.write_script(name, "x = 1\n")
+        self.write_script(".gitignore", "# local files\n/skipped/\nscratch_*.py\n")
+
+        categories = list(generate_html_index.discover_categories(self.tmp_dir))
+        join = os.path.join
+        self.assertEqual(categories, [
+            ("Root Scripts", [join(self.tmp_dir, "a.py")]),
+            ("Scripts in pkg/sub/", [join(self.tmp_dir, "pkg", "sub", "deep.py")]),
+            ("Test Scripts (tests/)", [join(self.tmp_dir, "tests", "test_a.py")]),
+        ])
+
+    # --- Tests for watch mode ---
+    def test_watcher_rebuilds_only_changed_scripts(self):
+        """Test that a poll only highlights scripts that were added or changed."""
+        a = self.write_script("a.py", "x = 1\n")
+        b = self.write_script("b.py", "y = 2\n")
+        scripts = [a, b]
+        output_path = os.path.join(self.tmp_dir, "index.html")
+        watcher = generate_html_index.IndexWatcher(lambda: [("Scripts", list(scripts))],
+                                                   output_path)
+
+        self.assertEqual(watcher.poll(), ([a, b], []))
+        self.assertEqual(watcher.poll(), ([], []))
+
+        self.write_script("b.py", "y = 'changed'\n")
+        os.utime(b, ns=(0, 0))  # make sure the signature differs even on coarse clocks
+        c = self.write_script("c.py", "z = 3\n")
+        scripts.append(c)
+        scripts.remove(a)
+        self.assertEqual(watcher.poll(), ([b, c], [a]))
+
+        # The page assembled from memory matches a full build of the same scripts.
+        expected = "".join(generate_html_index.iter_index_page([("Scripts", scripts)],
+                                                               watcher.pygments_css))
+        with open(output_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_main_writes_index(self):
+        """Test that main() writes index.html for the scripts in the working directory."""
+        self.write_script("hello.py", "print('hello')\n")
+        old_cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        try:
+            generate_html_index.main(["--cache-dir", self.cache_dir])
+            with open("index.html", 'r', encoding='utf-8') as f:
+                page = f.read()
+        finally:
+            os.chdir(old_cwd)
+        self.assertIn("hello.py", page)
+        self.assertTrue(page.startswith("<!DOCTYPE html>"))
+
+
+    def test_main_reports_failing_step_and_exits_non_zero(self):
+        """Test that a failure after index.html is written names its step and exits with 1."""
+        self.write_script("hello.py", "print('hello')\n")
+        old_cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        output = io.StringIO()
+        try:
+            with mock.patch.object(generate_html_index, "precompress_outputs",
+                                   side_effect=OSError("disk full")), \
+                    contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as exit_info:
+                generate_html_index.main(["--cache-dir", self.cache_dir, "--precompress"])
+        finally:
+            os.chdir(old_cwd)
+        self.assertEqual(exit_info.exception.code, 1)
+        self.assertIn("Error precompressing the output files: disk full", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()